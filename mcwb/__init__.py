@@ -7,14 +7,17 @@ from mcwb.types import (
     Anchor3Face,
     Cuboid,
     Direction,
+    Grab,
     Items,
     Planes3d,
     Profile,
+    Render,
     Row,
     Vec3,
 )
 from mcwb.blocks import Blocks
-from mcwb.volume import Volume
+from mcwb.palette import Palette
+from mcwb.volume import Volume, VolumeArray, VolumeSet
 
 __all__ = [
     "Anchor",
@@ -23,12 +26,17 @@ __all__ = [
     "Blocks",
     "Cuboid",
     "Direction",
+    "Grab",
     "Items",
+    "Palette",
     "Planes3d",
     "Profile",
+    "Render",
     "Row",
     "Vec3",
     "Volume",
+    "VolumeArray",
+    "VolumeSet",
     "make_tunnel",
     "polygon",
     "get_block",
@@ -0,0 +1,389 @@
+"""
+Asynchronous versions of the building API for use on an asyncio event loop
+"""
+import asyncio
+from itertools import count
+from pathlib import Path
+from typing import Any, Awaitable, Dict, Iterable, Optional, Union
+
+import numpy as np
+from mcipc.rcon.commands.execute import execute
+from mcipc.rcon.enumerations import FillMode, Item
+from mcipc.rcon.errors import check_result
+from mcipc.rcon.functions import str_until_none
+from mcipc.rcon.je.commands.fill import fill as fill_command
+from mcipc.rcon.je.commands.forceload import forceload
+from mcipc.rcon.je.commands.loot import loot
+from mcipc.rcon.je.commands.setblock import setblock
+from rcon.exceptions import WrongPassword
+from rcon.source.proto import LittleEndianSignedInt32, Packet, Type
+
+from mcwb.api import _dump, _loot_item, tunnel_fills
+from mcwb.blocks import Blocks
+from mcwb.palette import Palette
+from mcwb.polygon import poly_profile
+from mcwb.types import (
+    Anchor,
+    Anchor3,
+    Cuboid,
+    Direction,
+    Items,
+    Planes3d,
+    Profile,
+    Render,
+    Vec3,
+)
+from mcwb.volume import Volume
+
+__all__ = [
+    "AsyncBlocks",
+    "AsyncClient",
+    "fill",
+    "get_block",
+    "grab",
+    "make_tunnel",
+    "polygon",
+    "walls",
+]
+
+
+class AsyncClient:
+    """
+    An asynchronous RCON client for the Java Edition.
+
+    Commands are pipelined over a single connection and replies are matched
+    to their commands by request id, so many builds and reads can share one
+    connection. At most concurrency commands are in flight at once.
+
+    Replies are assumed to fit into a single packet, which holds for the
+    commands used by mcwb.
+    """
+
+    execute = property(execute)
+    fill = fill_command
+    forceload = property(forceload)
+    loot = property(loot)
+    setblock = setblock
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        passwd: str,
+        *,
+        concurrency: int = 64,
+        encoding: str = "utf-8",
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.passwd = passwd
+        self.concurrency = concurrency
+        self.encoding = encoding
+
+        self._limit = asyncio.Semaphore(concurrency)
+        self._ids = count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._receiver: Optional[asyncio.Task] = None
+        # why the receiver stopped, once the connection has failed
+        self._error: Optional[ConnectionError] = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, typ, value, traceback) -> None:
+        await self.close()
+
+    async def connect(self) -> None:
+        """connect to the server and log in"""
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+        self._error = None
+        self._writer.write(bytes(Packet.make_login(self.passwd)))
+        await self._writer.drain()
+
+        while (response := await Packet.aread(self._reader)).type != Type(2):
+            pass  # skip anything before SERVERDATA_AUTH_RESPONSE
+
+        if response.id == -1:
+            await self.close()
+            raise WrongPassword()
+
+        self._receiver = asyncio.create_task(self._receive())
+
+    async def close(self) -> None:
+        """close the connection"""
+        if self._receiver is not None:
+            self._receiver.cancel()
+            self._receiver = None
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+    async def run(self, command: str, *arguments: str) -> str:
+        """run a command and return the checked response"""
+        if self._writer is None:
+            raise ConnectionError("not connected")
+
+        text = " ".join(str_until_none(command, *arguments))
+
+        async with self._limit:
+            if self._error is not None:
+                raise self._error
+            request_id = next(self._ids) % LittleEndianSignedInt32.MAX
+            reply = asyncio.get_running_loop().create_future()
+            self._pending[request_id] = reply
+            packet = Packet(
+                LittleEndianSignedInt32(request_id),
+                Type.SERVERDATA_EXECCOMMAND,
+                text.encode(self.encoding),
+            )
+            self._writer.write(bytes(packet))
+            await self._writer.drain()
+            response = await reply
+
+        return check_result(response)
+
+    async def _receive(self) -> None:
+        """pass each reply to the command waiting for it"""
+        assert self._reader is not None
+        try:
+            while True:
+                packet = await Packet.aread(self._reader)
+                reply = self._pending.pop(packet.id, None)
+                if reply is not None and not reply.done():
+                    reply.set_result(packet.payload.decode(self.encoding))
+        except Exception as error:  # pylint: disable=W0703
+            # no more replies will arrive, fail this and any later command
+            self._error = ConnectionError(error)
+            for reply in self._pending.values():
+                if not reply.done():
+                    reply.set_exception(self._error)
+            self._pending.clear()
+
+
+async def _run_all(client: AsyncClient, commands: Iterable[Awaitable]) -> None:
+    """
+    await the commands with at most client.concurrency outstanding, without
+    creating all of the coroutines up front
+    """
+    pending: set = set()
+    try:
+        for command in commands:
+            pending.add(asyncio.ensure_future(command))
+            if len(pending) >= client.concurrency:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                _check(done)
+
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_EXCEPTION
+            )
+            _check(done)
+    finally:
+        # after an error stop the commands still in flight
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def _check(done: Iterable[asyncio.Future]) -> None:
+    """raise the first error of finished tasks, retrieving all of them"""
+    errors = [task.exception() for task in done]
+    for error in errors:
+        if error is not None:
+            raise error
+
+
+async def make_tunnel(
+    client: AsyncClient,
+    profile: Union[Profile, np.ndarray],
+    start: Vec3,
+    *,
+    end: Optional[Vec3] = None,
+    direction: Vec3 = Direction.UP,
+    length: int = 1,
+    anchor: Anchor = Anchor.CENTER,
+    default: Item = Item.AIR,
+    mode: FillMode = FillMode.KEEP,
+    filter: Optional[str] = None,
+) -> None:
+    """Creates a tunnel with the given profile."""
+
+    fills = tunnel_fills(
+        profile,
+        start,
+        end=end,
+        direction=direction,
+        length=length,
+        anchor=anchor,
+        default=default,
+        mode=mode,
+    )
+    await _run_all(
+        client,
+        (client.fill(first, last, block, mode, filter) for block, first, last in fills),
+    )
+
+
+async def polygon(
+    client: AsyncClient,
+    center: Vec3,
+    height: int,
+    diameter: int,
+    sides=4,
+    direction=Direction.UP,
+    item: Item = Item.STONE,
+    offset=None,
+    mode=FillMode.KEEP,
+    fill_item: Item = Item.AIR,
+) -> None:
+    """Place a polygon in the world"""
+
+    profile = poly_profile(
+        sides=sides, diameter=diameter, item=item, offset=offset, fill_item=fill_item
+    )
+    await make_tunnel(
+        client, profile, center, length=height, direction=direction, mode=mode
+    )
+
+
+async def get_block(client: AsyncClient, pos: Vec3) -> Item:
+    """Get the block at the given position."""
+
+    output = await client.loot.spawn(_dump(pos)).mine(pos)
+    return _loot_item(output)
+
+
+async def grab_indices(
+    client: AsyncClient, vol: Volume, palette: Palette
+) -> np.ndarray:
+    """
+    copy blocks from a Volume in the minecraft world into an array of
+    indices into palette, reading many blocks concurrently
+    """
+    cube = np.zeros(vol.size.i_tuple, dtype=np.uint16)
+
+    async def read(idx: tuple) -> None:
+        cube[idx] = palette.index(await get_block(client, vol.start + Vec3(*idx)))
+
+    await _run_all(client, (read(idx) for idx in np.ndindex(cube.shape)))
+
+    return cube.astype(palette.dtype)
+
+
+async def grab(client: AsyncClient, vol: Volume) -> Cuboid:
+    """copy blocks from a Volume in the minecraft world into a cuboid of Item"""
+    palette = Palette()
+    result = await grab_indices(client, vol, palette)
+
+    return palette.decode(result).tolist()  # type: ignore
+
+
+async def fill(client: AsyncClient, volume: Volume, block: Item = Item.AIR) -> None:
+    """Fill the Volume with a single block type, supports large volumes"""
+    await _run_all(
+        client,
+        (client.fill(start, end, block.value) for start, end in volume.fill_boxes()),
+    )
+
+
+async def walls(
+    client: AsyncClient, volume: Volume, block: Item, **faces: Any
+) -> None:
+    """renders walls at the faces of the volume, see Volume.wall_boxes"""
+    await _run_all(
+        client,
+        (
+            client.fill(start, end, block.value)
+            for start, end in volume.wall_boxes(**faces)
+        ),
+    )
+
+
+class AsyncBlocks(Blocks):
+    """
+    Blocks rendered through an AsyncClient. Rendering and the
+    transformations are coroutines, the commands of each one are sent
+    concurrently. Nothing is rendered on construction, await render().
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        position: Vec3,
+        cube: Union[Items, np.ndarray],
+        anchor: Anchor3 = Anchor3.BOTTOM_NW,
+        strategy: Render = Render.FILL,
+        palette: Optional[Palette] = None,
+    ) -> None:
+        self._queued: list = []
+        super().__init__(
+            client,  # type: ignore
+            position,
+            cube,
+            anchor,
+            render=False,
+            strategy=strategy,
+            palette=palette,
+        )
+
+    @classmethod
+    async def from_volume(  # type: ignore[override]
+        cls, client: AsyncClient, volume: Volume
+    ) -> "AsyncBlocks":
+        """create an AsyncBlocks object from a Volume"""
+        palette = Palette()
+        indices = await grab_indices(client, volume, palette)
+        return cls(client, volume.position, indices, palette=palette)
+
+    def _place(self, block: Item, start: Vec3, end: Vec3) -> None:
+        if start == end:
+            self._queued.append(self._client.setblock(start, block))
+        else:
+            self._queued.append(self._client.fill(start, end, block))
+
+    async def _send(self) -> None:
+        queued, self._queued = self._queued, []
+        await _run_all(self._client, queued)  # type: ignore
+
+    async def render(self) -> None:
+        """render the blocks into Minecraft"""
+        self._render()
+        await self._send()
+
+    async def rotate(  # type: ignore[override]
+        self, plane: Planes3d, steps: int = 1, clear=True
+    ) -> None:
+        """rotate the blocks in place and redraw the cells that changed"""
+        super().rotate(plane, steps, clear)
+        await self._send()
+
+    async def move(  # type: ignore[override]
+        self, vector: Vec3, clear: bool = True
+    ) -> None:
+        """moves the cuboid by vector and redraws the cells that changed"""
+        super().move(vector, clear)
+        await self._send()
+
+    async def move_to(  # type: ignore[override]
+        self, position: Vec3, clear: bool = True
+    ) -> None:
+        """moves the cuboid to position and redraws the cells that changed"""
+        super().move_to(position, clear)
+        await self._send()
+
+    async def load_blocks(self, file: Path) -> None:  # type: ignore[override]
+        """load the blocks from a file"""
+        self._load(file)
+        await self.render()
+
+    async def place_template(self, name: str) -> None:  # type: ignore[override]
+        """place the blocks with a single command from a structure file"""
+        await self._client.run("place", "template", name, self.volume.start)
@@ -0,0 +1,239 @@
+"""
+Read blocks directly from the region (.mca) files of a world save
+"""
+import gzip
+import mmap
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple, Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import nbt
+from mcwb.functions import unpack_bits
+from mcwb.palette import Palette
+from mcwb.types import Grab, Vec3
+from mcwb.volume import CHUNK_SIZE, Volume
+
+__all__ = ["AnvilWorld"]
+
+SECTOR = 4096
+REGION_CHUNKS = 32  # chunks along each side of a region
+
+# the first data version that does not split block states across longs
+NO_SPANNING_DATA_VERSION = 2529
+
+# chunk compression types, the flag marks chunks stored in their own file
+GZIP, ZLIB, UNCOMPRESSED, LZ4 = 1, 2, 3, 4
+EXTERNAL = 128
+
+
+class _Region:
+    """a memory mapped region file"""
+
+    def __init__(self, path: Path, rx: int, rz: int) -> None:
+        self._path = path
+        self._origin = rx * REGION_CHUNKS, rz * REGION_CHUNKS
+        self._file = open(path, "rb")
+        try:
+            self._map: Optional[mmap.mmap] = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError:  # an empty file
+            self._map = None
+        self._locations = (
+            np.frombuffer(self._map, dtype=">u4", count=REGION_CHUNKS**2)
+            if self._map is not None and len(self._map) >= 2 * SECTOR
+            else np.zeros(REGION_CHUNKS**2, dtype=">u4")
+        )
+
+    def close(self) -> None:
+        del self._locations
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def chunk(self, x: int, z: int) -> Optional[Dict[str, Any]]:
+        """the NBT of the chunk at x, z (relative to the region)"""
+        location = int(self._locations[x + z * REGION_CHUNKS])
+        offset = (location >> 8) * SECTOR
+        if offset == 0 or self._map is None:
+            return None  # not generated yet
+
+        length = int.from_bytes(self._map[offset : offset + 4], "big")
+        compression = self._map[offset + 4]
+        cx, cz = self._origin[0] + x, self._origin[1] + z
+        if compression & EXTERNAL:
+            # chunks too large for the region file have a file of their own
+            data = (self._path.parent / f"c.{cx}.{cz}.mcc").read_bytes()
+            compression &= ~EXTERNAL
+        else:
+            data = self._map[offset + 5 : offset + 4 + length]
+
+        if compression == GZIP:
+            data = gzip.decompress(data)
+        elif compression == ZLIB:
+            data = zlib.decompress(data)
+        elif compression == LZ4:
+            raise ValueError(
+                f"chunk {cx}, {cz} in {self._path} is LZ4 compressed, which is not "
+                "supported: set region-file-compression=deflate in "
+                "server.properties and optimize the world"
+            )
+        elif compression != UNCOMPRESSED:
+            raise ValueError(
+                f"chunk {cx}, {cz} in {self._path} has unsupported compression "
+                f"{compression}"
+            )
+
+        return nbt.loads(data)
+
+
+class AnvilWorld:
+    """
+    A read only view of the blocks in a world save, reading the region
+    files directly without a server. Region files are memory mapped and the
+    block states of each chunk section are unpacked with numpy.
+
+    An AnvilWorld can be passed in place of a Client to get_block and grab.
+    grab_indices returns the array that Blocks is built from:
+        Blocks(client, vol.position, world.grab_indices(vol, palette), palette=palette)
+    Chunks that have not been generated are air. Block state properties are
+    not represented by Item and are dropped. Blocks that Item does not know
+    (from newer versions or mods) raise ValueError, or read as unknown if it
+    is given; their names are collected in unknown_names.
+    """
+
+    def __init__(self, path: Union[Path, str], unknown: Optional[Item] = None) -> None:
+        """path is the world folder or its region folder"""
+        path = Path(path)
+        self.path = path / "region" if (path / "region").is_dir() else path
+        self.unknown = unknown
+        self.unknown_names: Set[str] = set()
+        self._regions: Dict[Tuple[int, int], Optional[_Region]] = {}
+
+    def __enter__(self) -> "AnvilWorld":
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the region files"""
+        for region in self._regions.values():
+            if region is not None:
+                region.close()
+        self._regions.clear()
+
+    def get_block(self, pos: Vec3) -> Item:
+        """Get the block at the given position."""
+        palette = Palette()
+        indices = self.grab_indices(Volume.from_corners(pos, pos), palette)
+        return palette[indices[0, 0, 0]]
+
+    def grab_indices(
+        self, vol: Volume, palette: Palette, strategy: Grab = Grab.CELLS
+    ) -> np.ndarray:
+        """
+        copy blocks from a Volume into an array of indices into palette,
+        strategy is ignored as every block is read anyway
+        """
+        start, end = vol.start.with_ints(), vol.end.with_ints()
+        cube = np.zeros(vol.size.i_tuple, dtype=np.uint16)
+
+        for column in vol.chunks():
+            cx, cz = column.chunk
+            sections = self._sections(cx, cz)
+            if not sections:
+                continue
+
+            for sy in range(start.y // CHUNK_SIZE, end.y // CHUNK_SIZE + 1):
+                if sy not in sections:
+                    continue
+                names, values = _decode(*sections[sy])
+                lookup = np.array(
+                    [palette.index(self._item(name, cx, cz)) for name in names],
+                    dtype=np.uint16,
+                )
+
+                # the part of the section inside the column, in world coords
+                base = Vec3(cx, sy, cz) * CHUNK_SIZE
+                lower = Vec3(*np.maximum(column.start, base))
+                upper = Vec3(*np.minimum(column.end, base + (CHUNK_SIZE - 1))) + 1
+                src = tuple(slice(a, b) for a, b in zip(lower - base, upper - base))
+                dst = tuple(slice(a, b) for a, b in zip(lower - start, upper - start))
+
+                cube[dst] = lookup[values[src]]
+
+        return cube.astype(palette.dtype)
+
+    def _item(self, name: str, cx: int, cz: int) -> Item:
+        """the Item of a block name found in chunk cx, cz"""
+        try:
+            return Item(name)
+        except ValueError:
+            if self.unknown is None:
+                raise ValueError(
+                    f"unknown block {name} in chunk {cx}, {cz}, pass unknown= "
+                    "to AnvilWorld to read such blocks as another Item"
+                ) from None
+            self.unknown_names.add(name)
+            return self.unknown
+
+    def _region(self, rx: int, rz: int) -> Optional[_Region]:
+        if (rx, rz) not in self._regions:
+            path = self.path / f"r.{rx}.{rz}.mca"
+            self._regions[rx, rz] = _Region(path, rx, rz) if path.exists() else None
+        return self._regions[rx, rz]
+
+    def _sections(self, cx: int, cz: int) -> Dict[int, Tuple[list, Any, bool]]:
+        """
+        the sections of a chunk by section y, as the arguments for _decode
+        """
+        region = self._region(cx // REGION_CHUNKS, cz // REGION_CHUNKS)
+        chunk = None
+        if region is not None:
+            chunk = region.chunk(cx % REGION_CHUNKS, cz % REGION_CHUNKS)
+        if chunk is None:
+            return {}
+
+        spanning = chunk.get("DataVersion", 0) < NO_SPANNING_DATA_VERSION
+        result = {}
+
+        if "sections" in chunk:  # 1.18 onward
+            for section in chunk["sections"]:
+                states = section.get("block_states")
+                if states:
+                    result[int(section["Y"])] = (
+                        states["palette"],
+                        states.get("data"),
+                        spanning,
+                    )
+        else:  # 1.13 to 1.17
+            for section in chunk.get("Level", {}).get("Sections", []):
+                if "Palette" in section:
+                    result[int(section["Y"])] = (
+                        section["Palette"],
+                        section.get("BlockStates"),
+                        spanning,
+                    )
+
+        return result
+
+
+def _decode(
+    palette: list, data: Optional[np.ndarray], spanning: bool
+) -> Tuple[list, np.ndarray]:
+    """unpack the block states of a section into an [x, y, z] array"""
+    names = [entry["Name"] for entry in palette]
+    count = CHUNK_SIZE**3
+
+    if data is None or len(names) == 1:
+        values = np.zeros(count, dtype=np.uint32)
+    else:
+        bits = max(4, (len(names) - 1).bit_length())
+        values = unpack_bits(data, bits, count, spanning)
+
+    # blocks are stored in y, z, x order
+    return names, values.reshape((CHUNK_SIZE,) * 3).transpose(2, 0, 1)
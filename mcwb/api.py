@@ -1,17 +1,30 @@
 """Exposed API functions."""
 
 import re
-from typing import Optional, Union
+from typing import Iterator, Optional, Tuple, Union
 
 import numpy as np
 from mcipc.rcon.client import Client
-from mcipc.rcon.enumerations import FillMode, Item
-
-from mcwb.functions import get_direction, normalize, offsets, validate
+from mcipc.rcon.enumerations import FillMode, Item, ScanMode
+
+from mcwb.functions import (
+    MAX_MINECRAFT_FILL_COMMAND,
+    get_direction,
+    offset_array,
+    rectangles,
+)
+from mcwb.palette import Palette
 from mcwb.polygon import poly_profile
 from mcwb.types import Anchor, Direction, Profile, Vec3
 
-__all__ = ["make_tunnel"]
+__all__ = [
+    "get_block",
+    "is_uniform",
+    "make_tunnel",
+    "polygon",
+    "tunnel_arrays",
+    "tunnel_fills",
+]
 
 
 def make_tunnel(
@@ -29,10 +42,72 @@ def make_tunnel(
 ):
     """Creates a tunnel with the given profile."""
 
+    blocks, starts, ends = tunnel_arrays(
+        profile,
+        start,
+        end=end,
+        direction=direction,
+        length=length,
+        anchor=anchor,
+        default=default,
+        mode=mode,
+    )
+    for block, first, last in zip(blocks, starts.tolist(), ends.tolist()):
+        client.fill(Vec3(*first), Vec3(*last), block, mode=mode, filter=filter)
+
+
+def tunnel_fills(
+    profile: Union[Profile, np.ndarray],
+    start: Vec3,
+    *,
+    end: Optional[Vec3] = None,
+    direction: Vec3 = Direction.UP,
+    length: int = 1,
+    anchor: Anchor = Anchor.CENTER,
+    default: Item = Item.AIR,
+    mode: Optional[FillMode] = None,
+) -> Iterator[Tuple[Item, Vec3, Vec3]]:
+    """Yields the (block, start, end) of each fill making up a tunnel."""
+
+    blocks, starts, ends = tunnel_arrays(
+        profile,
+        start,
+        end=end,
+        direction=direction,
+        length=length,
+        anchor=anchor,
+        default=default,
+        mode=mode,
+    )
+    for block, first, last in zip(blocks, starts.tolist(), ends.tolist()):
+        yield block, Vec3(*first), Vec3(*last)
+
+
+def tunnel_arrays(
+    profile: Union[Profile, np.ndarray],
+    start: Vec3,
+    *,
+    end: Optional[Vec3] = None,
+    direction: Vec3 = Direction.UP,
+    length: int = 1,
+    anchor: Anchor = Anchor.CENTER,
+    default: Item = Item.AIR,
+    mode: Optional[FillMode] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    the fills making up a tunnel as arrays: the block of each fill and the
+    (n, 3) coordinates of their starts and ends. Cells of the profile with
+    the same block are merged into rectangles with one fill each, unless
+    mode is HOLLOW or OUTLINE where a merged fill would only build its shell.
+    """
+
     start = Vec3(*start)  # Ensure Vec3 object.
 
-    if validate(profile) != 2:
+    # validate and normalize, vectorized for large profiles
+    grid = np.array(profile, dtype=object)
+    if grid.ndim != 2:
         raise ValueError("Invalid matrix.")
+    grid[grid == None] = default  # noqa: E711 (elementwise)
 
     if end is None:
         end = start + direction * (length - 1)
@@ -40,10 +115,28 @@ def make_tunnel(
         end = Vec3(*end)  # Ensure Vec3 object.
 
     direction = direction or get_direction(start, end)
-    profile = list(normalize(profile, default=default))
+    palette = Palette()
+    indices = palette.encode(grid)
+    cells = offset_array(indices.shape, direction, anchor)
+
+    # merge cells of the same block into rectangles, each extruded along the
+    # tunnel must still fit in one fill
+    length = (abs(end - start) + 1).volume
+    limit = max(1, MAX_MINECRAFT_FILL_COMMAND // int(length))
+    if mode in (FillMode.HOLLOW, FillMode.OUTLINE):
+        limit = 1
+    merged = list(rectangles(indices, max_area=limit))
+
+    blocks = palette.decode(np.array([index for index, _, _ in merged], dtype=int))
+    firsts = np.array([first for _, first, _ in merged]).reshape(-1, 2)
+    lasts = np.array([last for _, _, last in merged]).reshape(-1, 2)
 
-    for block, offset in offsets(profile, direction, anchor):
-        client.fill(start + offset, end + offset, block, mode=mode, filter=filter)
+    # offsets are linear in the cell indices, so opposite corners of a
+    # rectangle give opposite corners of its fill
+    starts = cells[firsts[:, 0], firsts[:, 1]] + np.array(start)
+    ends = cells[lasts[:, 0], lasts[:, 1]] + np.array(end)
+
+    return blocks, starts, ends
 
 
 def polygon(
@@ -78,14 +171,45 @@ _extract_item = re.compile(r".*minecraft\:(?:blocks\/)?(.+)$")
 def get_block(client: Client, pos: Vec3):
     """Get the block at the given position."""
 
+    # clients with a cheaper lookup (e.g. BlockProbe)
+    lookup = getattr(client, "get_block", None)
+    if lookup is not None:
+        return lookup(pos)
+
+    # currently the only way to test for a block is to use the loot spawn
+    # command, this creates an entity that falls into the void
+    output = client.loot.spawn(_dump(pos)).mine(pos)
+    return _loot_item(output)
+
+
+def is_uniform(client: Client, start: Vec3, end: Vec3) -> bool:
+    """
+    test whether the volume from start to end contains a single block type,
+    by comparing it with itself shifted by one block along each axis
+    """
+    for step in (Vec3(1, 0, 0), Vec3(0, 1, 0), Vec3(0, 0, 1)):
+        last = end - step
+        if last.x < start.x or last.y < start.y or last.z < start.z:
+            continue  # the volume is one block thick on this axis
+
+        output = client.execute.if_.blocks(start, last, start + step, ScanMode.ALL)()
+        if not output.startswith("Test passed"):
+            return False
+
+    return True
+
+
+def _dump(pos: Vec3) -> Tuple:
+    """the position to dump the entity created by get_block"""
+
     # loot.spawn creates an entity - We choose to dump it into the void.
     # We choose the point right below pos to avoid any issues with
     # the block being in an chunk that is not loaded.
-    dump = (pos.x, _bottom, pos.z)
+    return (pos.x, _bottom, pos.z)
 
-    # currently the only way to test for a block is to use the loot spawn
-    # command, this creates an entity that falls into the void
-    output = client.loot.spawn(dump).mine(pos)
+
+def _loot_item(output: str) -> Item:
+    """extract the block from the response to a loot spawn command"""
     match = _extract_item.search(output)
     if not match:
         raise ValueError(f"unexpected response from loot spawn: {output}")
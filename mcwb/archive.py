@@ -0,0 +1,220 @@
+"""
+A chunked archive format for large Cuboids of Items
+
+The cuboid is split into 16x16x16 chunks (smaller at the far edges), each
+compressed on its own so that any part of the cuboid can be read without
+decompressing the rest. Identical chunks, e.g. all air or all stone, are
+stored once. A file holds a short fixed prefix, a JSON header and the
+compressed chunks:
+    b"MCWA", version (uint8), reserved (uint8), header length (uint32 LE)
+    header: {"shape": [...], "dtype": "|u1", "palette": [...],
+             "chunk_size": 16, "chunks": [[offset, length], ...],
+             "index": [...]}
+    data: the zlib compressed chunks, offsets are relative to its start
+index holds the position in chunks of every chunk of the cuboid, in C
+order of chunk coordinates. Rows and Profiles are stored with their own
+shape and read as if they were Cuboids one block thick.
+
+Each file holds a single cuboid, so chunks are only shared within it.
+"""
+import json
+import struct
+import zlib
+from itertools import product
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.palette import Palette
+from mcwb.types import Vec3
+from mcwb.volume import CHUNK_SIZE, Volume
+
+__all__ = [
+    "ARCHIVE_SUFFIX",
+    "Archive",
+    "is_archive",
+    "load_archive",
+    "save_archive",
+]
+
+ARCHIVE_SUFFIX = ".mcwa"  # the file extension that selects the archive format
+
+MAGIC = b"MCWA"
+VERSION = 1
+_PREFIX = struct.Struct("<4sBBI")
+
+
+def save_archive(
+    indices: np.ndarray,
+    palette: Palette,
+    filename: Union[Path, str],
+    chunk_size: int = CHUNK_SIZE,
+    level: int = 6,
+) -> None:
+    """save an array of indices into palette as a chunked archive"""
+    indices = np.asarray(indices, dtype=palette.dtype)
+    if not 1 <= indices.ndim <= 3:
+        raise ValueError("only a Row, Profile or Cuboid can be archived")
+    counts = [-(-n // chunk_size) for n in indices.shape]
+
+    blobs: List[bytes] = []
+    chunks: List[List[int]] = []
+    index: List[int] = []
+    seen: Dict[Tuple[Tuple[int, ...], bytes], int] = {}
+    offset = 0
+
+    for chunk in product(*(range(n) for n in counts)):
+        cells = indices[_slices(chunk, chunk_size, indices.shape)]
+        key = (cells.shape, cells.tobytes())
+        if key not in seen:
+            blob = zlib.compress(key[1], level)
+            seen[key] = len(chunks)
+            chunks.append([offset, len(blob)])
+            blobs.append(blob)
+            offset += len(blob)
+        index.append(seen[key])
+
+    header = {
+        "shape": list(indices.shape),
+        "dtype": indices.dtype.str,
+        "palette": [item.value for item in palette],
+        "chunk_size": chunk_size,
+        "chunks": chunks,
+        "index": index,
+    }
+    text = json.dumps(header, separators=(",", ":")).encode("utf-8")
+
+    with open(filename, "wb") as file:
+        file.write(_PREFIX.pack(MAGIC, VERSION, 0, len(text)))
+        file.write(text)
+        for blob in blobs:
+            file.write(blob)
+
+
+def is_archive(filename: Union[Path, str]) -> bool:
+    """determine if a file is in the archive format"""
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def load_archive(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """load a whole archive as an array of indices into palette"""
+    with Archive(filename) as archive:
+        return archive.read(palette)
+
+
+class Archive:
+    """
+    An open archive file. Only the header is read when it is opened, read()
+    decompresses just the chunks that intersect the requested volume.
+    """
+
+    def __init__(self, filename: Union[Path, str]) -> None:
+        self._file: BinaryIO = open(filename, "rb")
+        try:
+            prefix = self._file.read(_PREFIX.size)
+            if len(prefix) < _PREFIX.size:
+                raise ValueError(f"{filename} is not an mcwb archive file")
+            magic, version, _, length = _PREFIX.unpack(prefix)
+            if magic != MAGIC:
+                raise ValueError(f"{filename} is not an mcwb archive file")
+            if version != VERSION:
+                raise ValueError(f"{filename} has unsupported version {version}")
+            self.header: Dict[str, Any] = json.loads(self._file.read(length))
+        except Exception:
+            self._file.close()
+            raise
+
+        self._data = _PREFIX.size + length
+        self.shape: Tuple[int, ...] = tuple(self.header["shape"])
+        # Rows and Profiles are handled as Cuboids that are one block thick
+        self._shape = self.shape + (1,) * (3 - len(self.shape))
+        self.chunk_size: int = self.header["chunk_size"]
+        self.items = [Item(name) for name in self.header["palette"]]
+
+        counts = [-(-n // self.chunk_size) for n in self._shape]
+        self._index = np.array(self.header["index"], dtype=np.int64).reshape(counts)
+        self._cache: Dict[int, np.ndarray] = {}
+
+        # statistics
+        self.chunks_read = 0
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """close the file"""
+        self._file.close()
+
+    @property
+    def volume(self) -> Volume:
+        """the Volume of the whole cuboid, with its first block at 0, 0, 0"""
+        return Volume.from_corners(Vec3(0, 0, 0), Vec3(*self._shape) - 1)
+
+    @property
+    def unique_chunks(self) -> int:
+        """the number of distinct chunks stored in the file"""
+        return len(self.header["chunks"])
+
+    def read(self, palette: Palette, volume: Optional[Volume] = None) -> np.ndarray:
+        """
+        read the indices (into palette) of volume, with coordinates relative
+        to the first block of the cuboid, or of the whole Row, Profile or
+        Cuboid in its saved shape
+        """
+        saved = self.volume
+        if volume is None:
+            return self.read(palette, saved).reshape(self.shape)
+        if not (saved.inside(volume.start) and saved.inside(volume.end)):
+            raise ValueError("volume is not inside the archive")
+
+        lookup = np.array([palette.index(item) for item in self.items])
+        start, end = volume.start.with_ints(), volume.end.with_ints()
+        cube = np.empty(volume.size.i_tuple, dtype=palette.dtype)
+
+        first, last = start // self.chunk_size, end // self.chunk_size
+        for chunk in product(*(range(a, b + 1) for a, b in zip(first, last))):
+            base = Vec3(*chunk) * self.chunk_size
+            cells = self._chunk(int(self._index[chunk]), chunk)
+
+            lower = Vec3(*np.maximum(start, base))
+            upper = Vec3(*np.minimum(end, base + Vec3(*cells.shape) - 1))
+            overlap = Volume.from_corners(lower, upper)
+            cube[overlap.slices(start)] = lookup[cells[overlap.slices(base)]]
+
+        return cube
+
+    def _chunk(self, number: int, chunk: Tuple[int, ...]) -> np.ndarray:
+        """
+        decompress a stored chunk, keeping the first few in memory as the
+        de-duplicated ones (e.g. air) tend to appear early and often
+        """
+        cells = self._cache.get(number)
+        if cells is None:
+            offset, length = self.header["chunks"][number]
+            self._file.seek(self._data + offset)
+            data = zlib.decompress(self._file.read(length))
+            slices = _slices(chunk, self.chunk_size, self._shape)
+            shape = [axis.stop - axis.start for axis in slices]
+            dtype = np.dtype(self.header["dtype"])
+            cells = np.frombuffer(data, dtype).reshape(shape)
+            self.chunks_read += 1
+            if len(self._cache) < 64:
+                self._cache[number] = cells
+
+        return cells
+
+
+def _slices(
+    chunk: Tuple[int, ...], chunk_size: int, shape: Tuple[int, ...]
+) -> Tuple[slice, ...]:
+    """the slices of the cells of chunk in an array of shape"""
+    return tuple(
+        slice(n * chunk_size, min((n + 1) * chunk_size, size))
+        for n, size in zip(chunk, shape)
+    )
@@ -0,0 +1,132 @@
+"""
+A compact binary file format for Rows, Profiles and Cuboids of Items
+
+A file holds a short fixed prefix, a JSON header and the array of palette
+indices as raw bytes:
+    b"MCWB", version (uint8), reserved (uint8), header length (uint32 LE)
+    header: {"shape": [...], "dtype": "|u1", "palette": [...],
+             "compression": null or "zlib"}, padded with spaces
+    data: the indices in C order, starting on a 64 byte boundary
+Uncompressed files are read straight into a numpy array, or memory mapped
+so that only the parts that are used are read.
+"""
+import json
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.palette import Palette
+
+__all__ = [
+    "SUFFIX",
+    "is_binary",
+    "load_indices",
+    "open_indices",
+    "read_header",
+    "save_indices",
+]
+
+SUFFIX = ".mcwb"  # the file extension that selects the binary format
+
+MAGIC = b"MCWB"
+VERSION = 1
+ALIGN = 64
+_PREFIX = struct.Struct("<4sBBI")
+
+
+def save_indices(
+    indices: np.ndarray,
+    palette: Palette,
+    filename: Union[Path, str],
+    compress: bool = False,
+) -> None:
+    """save an array of indices into palette"""
+    indices = np.ascontiguousarray(indices, dtype=palette.dtype)
+    header = {
+        "shape": list(indices.shape),
+        "dtype": indices.dtype.str,
+        "palette": [item.value for item in palette],
+        "compression": "zlib" if compress else None,
+    }
+    text = json.dumps(header).encode("utf-8")
+    text += b" " * (-(_PREFIX.size + len(text)) % ALIGN)
+
+    with open(filename, "wb") as file:
+        file.write(_PREFIX.pack(MAGIC, VERSION, 0, len(text)))
+        file.write(text)
+        if compress:
+            file.write(zlib.compress(indices.tobytes()))
+        else:
+            file.write(indices.data)
+
+
+def read_header(filename: Union[Path, str]) -> Tuple[Dict[str, Any], int]:
+    """read the header of a file, returns the header and the data offset"""
+    with open(filename, "rb") as file:
+        magic, version, _, length = _PREFIX.unpack(file.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not an mcwb binary file")
+        if version != VERSION:
+            raise ValueError(f"{filename} has unsupported version {version}")
+        header = json.loads(file.read(length))
+
+    return header, _PREFIX.size + length
+
+
+def is_binary(filename: Union[Path, str]) -> bool:
+    """determine if a file is in the binary format"""
+    with open(filename, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+def load_indices(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """load an array of indices into palette"""
+    header, offset = read_header(filename)
+    dtype = np.dtype(header["dtype"])
+
+    if header["compression"] == "zlib":
+        with open(filename, "rb") as file:
+            file.seek(offset)
+            data = np.frombuffer(bytearray(zlib.decompress(file.read())), dtype)
+    elif header["compression"] is None:
+        data = np.fromfile(filename, dtype=dtype, offset=offset)
+    else:
+        raise ValueError(f"unsupported compression {header['compression']}")
+    data = data.reshape(header["shape"])
+
+    lookup = np.array([palette.index(Item(name)) for name in header["palette"]])
+    if np.array_equal(lookup, np.arange(len(lookup))):
+        return data.astype(palette.dtype, copy=False)  # no need to translate
+
+    return lookup[data].astype(palette.dtype)
+
+
+def open_indices(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """
+    like load_indices, but the array is memory mapped so that opening is
+    instant and only the pages of the file that are touched are read.
+    Slice the result to read part of a large cuboid.
+
+    The array stays mapped when palette translates the file's palette
+    unchanged, e.g. a new Palette. Otherwise, and for compressed files,
+    the whole array is loaded.
+    """
+    header, offset = read_header(filename)
+    if header["compression"] is not None:
+        return load_indices(filename, palette)
+
+    lookup = np.array([palette.index(Item(name)) for name in header["palette"]])
+    if not np.array_equal(lookup, np.arange(len(lookup))):
+        return load_indices(filename, palette)
+
+    return np.memmap(
+        filename,
+        dtype=np.dtype(header["dtype"]),
+        mode="r",
+        offset=offset,
+        shape=tuple(header["shape"]),
+    )
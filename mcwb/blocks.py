@@ -1,21 +1,40 @@
 """ render and transform cuboids of blocks in minecraft space """
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 
 import numpy as np
 from mcipc.rcon.enumerations import Item
 from mcipc.rcon.je import Client
 
-from mcwb.functions import shift
-from mcwb.itemlists import grab, load_items, save_items
-from mcwb.types import Anchor3, Cuboid, Items, Planes3d, Vec3
-from mcwb.volume import Volume
+from mcwb.archive import ARCHIVE_SUFFIX, Archive, load_archive, save_archive
+from mcwb.binary import SUFFIX, open_indices, save_indices
+from mcwb.functions import boxes
+from mcwb.itemlists import grab_indices, load_items, save_items
+from mcwb.palette import Palette
+from mcwb.schematic import load_litematic, load_schem
+from mcwb.structure import load_structure, save_structure
+from mcwb.types import Anchor3, Cuboid, Items, Planes3d, Render, Vec3
+from mcwb.volume import CHUNK_SIZE, MAX_MINECRAFT_FILL_COMMAND, Volume
+
+# loaders of palette indices for files that are not JSON, by suffix
+_LOADERS = {
+    SUFFIX: open_indices,
+    ARCHIVE_SUFFIX: load_archive,
+    ".litematic": load_litematic,
+    ".nbt": load_structure,
+    ".schem": load_schem,
+}
 
 
 class Blocks:
     """
     Represents a cubiod of arbitrary blocks in a minecraft world with functions
     for transforming and rendering those blocks in the world
+
+    The blocks are held as an array of small integers (indices) into a
+    Palette of Items, ncube presents them as an array of Item. ncube is a
+    read-only copy decoded on each access: change blocks by assigning a new
+    cube to ncube or by writing palette indices into indices.
     """
 
     def __init__(
@@ -25,99 +44,231 @@ class Blocks:
         cube: Union[Items, np.ndarray],
         anchor: Anchor3 = Anchor3.BOTTOM_NW,
         render: bool = True,
+        strategy: Render = Render.FILL,
+        palette: Optional[Palette] = None,
     ) -> None:
         self._client = client
         self.anchor = anchor
         self.position = position
+        self.strategy = strategy
+        # number of commands the last render saved over one setblock per block
+        self.saved_commands = 0
 
-        if isinstance(cube, np.ndarray):
-            self.ncube = cube
+        if palette is None:
+            self.palette = Palette()
+            self.ncube = cube  # type: ignore
         else:
-            self.ncube = np.array(cube, dtype=Item)
+            # cube is already an array of indices into palette
+            self.palette = palette
+            self.indices = np.asarray(cube)
 
         self._create()
 
         if render:
             self._render()
 
+    @property
+    def ncube(self) -> np.ndarray:
+        """the blocks as a read-only array of Item"""
+        cube = self.palette.decode(self.indices)
+        # writes to the copy would be lost, so make them fail instead
+        cube.flags.writeable = False
+        return cube
+
+    @ncube.setter
+    def ncube(self, cube: Union[Items, np.ndarray]) -> None:
+        self.indices = self.palette.encode(cube)
+
     def _create(self) -> None:
-        if self.ncube.ndim != 3:
+        if self.indices.ndim != 3:
             raise ValueError("invalid cube specification")
 
         self.volume = Volume.from_anchor(
-            self.position, Vec3(*self.ncube.shape), self.anchor
+            self.position, Vec3(*self.indices.shape), self.anchor
         )
-        self._solid: Any = self.ncube != Item.AIR
+        self._solid: Any = self.indices != 0
 
     @classmethod
     def from_volume(cls, client: Client, volume: Volume) -> "Blocks":
         """create a Blocks object from a Volume"""
-        cuboid = grab(client, volume)
-        return cls(client, volume.position, cuboid)
+        palette = Palette()
+        indices = grab_indices(client, volume, palette)
+        return cls(client, volume.position, indices, palette=palette)
+
+    @classmethod
+    def from_file(
+        cls,
+        client: Client,
+        position: Vec3,
+        file: Path,
+        volume: Optional[Volume] = None,
+        **kwargs: Any,
+    ) -> "Blocks":
+        """
+        create a Blocks object from a file saved by save_blocks (or any file
+        that load_blocks reads). If volume is given only that part of the
+        saved cuboid is used, with coordinates relative to its first block.
+        Uncompressed .mcwb files are memory mapped and only the chunks of
+        .mcwa archives that intersect volume are decompressed, so that only
+        the blocks in volume are read from disk.
+        """
+        palette = Palette()
+        if Path(file).suffix == ARCHIVE_SUFFIX:
+            with Archive(file) as archive:
+                indices = archive.read(palette, volume)
+            return cls(client, position, indices, palette=palette, **kwargs)
+
+        indices = _read(file, palette)
+        if volume is not None:
+            saved = Volume.from_corners(Vec3(0, 0, 0), Vec3(*indices.shape) - 1)
+            if not (saved.inside(volume.start) and saved.inside(volume.end)):
+                raise ValueError("volume is not inside the saved blocks")
+            indices = indices[volume.slices()]
+
+        return cls(client, position, indices, palette=palette, **kwargs)
 
     def _render(self) -> None:
         """render the blocks into Minecraft"""
-        for idx, block in np.ndenumerate(self.ncube):
-            if self._solid[idx]:
-                self._client.setblock(self.volume.start + Vec3(*idx), block)
+        if self.strategy is Render.SETBLOCK:
+            for idx in np.argwhere(self._solid):
+                block = self.palette[self.indices[tuple(idx)]]
+                position = self.volume.start + Vec3(*idx)
+                self._place(block, position, position)
+            self.saved_commands = 0
+        else:
+            commands = self._fill(self.indices, self._solid, self.volume.start)
+            self.saved_commands = int(np.count_nonzero(self._solid)) - commands
 
-    def _unrender(self, vector: Vec3, old_start: Vec3) -> None:
-        """clear away exposed blocks from the previous move"""
-        moved = shift(self.ncube, vector * 1)
+    def _fill(self, indices: np.ndarray, mask: Any, origin: Vec3) -> int:
+        """
+        render the cells of indices selected by mask at origin, merging
+        identical neighbours into fill commands. Returns the number of
+        commands sent.
+        """
+        found = list(boxes(indices, mask, MAX_MINECRAFT_FILL_COMMAND))
 
-        mask: Any = (moved == Item.AIR) & (self.ncube != Item.AIR)
+        # in chunk column order, so that each chunk is visited once
+        def column(box: Tuple[Any, Vec3, Vec3]) -> Tuple[int, int]:
+            start = origin + box[1]
+            return int(start.x) // CHUNK_SIZE, int(start.z) // CHUNK_SIZE
 
-        for idx, block in np.ndenumerate(self.ncube):
-            if mask[idx]:
-                self._client.setblock(old_start + Vec3(*idx), Item.AIR.value)
+        for index, start, end in sorted(found, key=column):
+            self._place(self.palette[index], origin + start, origin + end)
 
-    def rotate(self, plane: Planes3d, steps: int = 1, clear=True) -> None:
-        """rotate the blocks in place"""
-        self.ncube = np.rot90(self.ncube, k=steps, axes=plane.value)
+        return len(found)
 
-        if clear:  # TODO implement unrender for rotated blocks (challenging?)
-            self.volume.fill(self._client)
+    def _place(self, block: Item, start: Vec3, end: Vec3) -> None:
+        """send the command that places block from start to end"""
+        if start == end:
+            self._client.setblock(start, block)
+        else:
+            self._client.fill(start, end, block)
 
-        self._solid = self.ncube != Item.AIR
-        self.volume = Volume.from_anchor(
-            self.volume.position, Vec3(*self.ncube.shape), self.anchor
-        )
+    def _redraw(self, old_cube: np.ndarray, old_volume: Volume, clear: bool) -> None:
+        """
+        update the world from the indices old_cube placed at old_volume to the
+        current contents and placement, only sending the cells that change
+        """
+        if not old_volume.intersects(self.volume):
+            # disjoint placements - no need to diff the space between them
+            if clear:
+                self._fill(np.zeros_like(old_cube), old_cube != 0, old_volume.start)
+            self._render()
+            return
 
-        self._render()
+        lower = Vec3(*np.minimum(old_volume.start, self.volume.start))
+        upper = Vec3(*np.maximum(old_volume.end, self.volume.end))
 
-    def move(self, vector: Vec3, clear: bool = True) -> None:
-        """moves the cuboid by vector and redraws it"""
-        old_start = self.volume.start
+        # -1 marks cells outside of a placement, their content is unknown
+        before = np.full((upper - lower + 1).i_tuple, -1, dtype=np.int32)
+        after = np.full_like(before, -1)
+        start, end = old_volume.start - lower, old_volume.end - lower + 1
+        before[start.x : end.x, start.y : end.y, start.z : end.z] = old_cube
+        start, end = self.volume.start - lower, self.volume.end - lower + 1
+        after[start.x : end.x, start.y : end.y, start.z : end.z] = self.indices
+
+        changed: Any = (after > 0) & (before != after)
+        if clear:
+            cleared = (before > 0) & (after <= 0)
+            after[cleared] = 0
+            changed |= cleared
+
+        self._fill(after, changed, lower)
+
+    def rotate(self, plane: Planes3d, steps: int = 1, clear=True) -> None:
+        """rotate the blocks in place and redraw the cells that changed"""
+        old_cube, old_volume = self.indices, self.volume
+        self.indices = np.rot90(self.indices, k=steps, axes=plane.value)
+
+        self._solid = self.indices != 0
         self.volume = Volume.from_anchor(
-            self.volume.position + vector, Vec3(*self.ncube.shape), self.anchor
+            self.volume.position, Vec3(*self.indices.shape), self.anchor
         )
 
-        self._render()
+        self._redraw(old_cube, old_volume, clear)
 
-        if clear:
-            self._unrender(vector, old_start)
+    def move(self, vector: Vec3, clear: bool = True) -> None:
+        """moves the cuboid by vector and redraws the cells that changed"""
+        self._move_to(self.volume.position + vector, clear)
 
     def move_to(self, position: Vec3, clear: bool = True) -> None:
-        """moves the cuboid to position and redraws it"""
-        old_volume = self.volume
-        self.volume = Volume.from_anchor(position, Vec3(*self.ncube.shape), self.anchor)
+        """moves the cuboid to position and redraws the cells that changed"""
+        self._move_to(position, clear)
 
-        self._render()
+    def _move_to(self, position: Vec3, clear: bool) -> None:
+        old_volume = self.volume
+        self.volume = Volume.from_anchor(
+            position, Vec3(*self.indices.shape), self.anchor
+        )
 
-        if clear:
-            old_volume.fill(self._client)
+        self._redraw(self.indices, old_volume, clear)
 
     def to_cuboid(self) -> Cuboid:
         """return the blocks' contents as a Cuboid"""
         return self.ncube.tolist() # type: ignore
 
-    def save_blocks(self, file: Path) -> None:
-        """save the blocks to a file"""
-        save_items(self.ncube, file)
+    def save_blocks(self, file: Path, compress: bool = False) -> None:
+        """
+        save the blocks to a JSON file, a structure file if it is .nbt, the
+        binary format if it is .mcwb (optionally compressed) or a chunked
+        archive if it is .mcwa
+        """
+        suffix = Path(file).suffix
+        if suffix == ".nbt":
+            save_structure(self.indices, self.palette, file)
+        elif suffix == ARCHIVE_SUFFIX:
+            save_archive(self.indices, self.palette, file)
+        elif suffix == SUFFIX:
+            save_indices(self.indices, self.palette, file, compress)
+        else:
+            save_items(self.ncube, file)
 
     def load_blocks(self, file: Path) -> None:
-        """load the blocks from a file"""
-        cube = load_items(file)
-        self.ncube = np.array(cube, dtype=Item)
-        self._create()
+        """
+        load the blocks from a JSON, binary (.mcwb), archive (.mcwa),
+        structure (.nbt), Sponge schematic (.schem) or Litematica
+        (.litematic) file
+        """
+        self._load(file)
         self._render()
+
+    def _load(self, file: Path) -> None:
+        self.indices = _read(file, self.palette)
+        self._create()
+
+    def place_template(self, name: str) -> None:
+        """
+        place the blocks with a single command from a structure saved with
+        save_blocks. The server looks for the structure name (namespace:path)
+        in <world>/generated/<namespace>/structures/<path>.nbt
+        """
+        self._client.run("place", "template", name, self.volume.start)
+
+
+def _read(file: Path, palette: Palette) -> np.ndarray:
+    """read a file of blocks as indices into palette"""
+    loader = _LOADERS.get(Path(file).suffix)
+    if loader is not None:
+        return loader(file, palette)
+
+    return palette.encode(load_items(file))
@@ -0,0 +1,305 @@
+"""
+Remember the blocks mcwb writes so that reading them back is a memory read
+"""
+from collections import OrderedDict
+from itertools import product
+from time import monotonic
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from mcipc.rcon.enumerations import FillMode, Item
+from mcipc.rcon.je import Client
+
+from mcwb.api import get_block
+from mcwb.itemlists import read_boxes
+from mcwb.palette import Palette
+from mcwb.types import Grab, Vec3
+from mcwb.volume import CHUNK_SIZE, Volume
+
+__all__ = ["BlockCache"]
+
+UNKNOWN = -1  # a cell of a section whose block is not known
+
+# a fill waiting to be applied to a section:
+# start, end, block index, mode, filter index
+Fill = Tuple[Vec3, Vec3, int, Optional[FillMode], Optional[int]]
+Key = Tuple[int, int, int]
+
+
+class _Section:
+    """the known blocks of a 16x16x16 section of the world"""
+
+    def __init__(self, key: Key, now: float) -> None:
+        self.key = key
+        self.cells = np.full((CHUNK_SIZE,) * 3, UNKNOWN, dtype=np.int16)
+        self.pending: List[Fill] = []
+        self.time = now
+
+
+class BlockCache:
+    """
+    A Client wrapper that caches blocks by 16x16x16 section.
+
+    Blocks written with fill and setblock are recorded as they are sent (a
+    fill is only expanded into the cells of a section when that section is
+    next read) and blocks read with get_block and grab are remembered. Reads
+    are served from the cache where possible and go to the server for
+    unknown cells only.
+
+    Sections are evicted least recently used first once there are more than
+    max_sections of them, and dropped ttl seconds after they were last
+    written or read from the server, as the world can be changed by other
+    means. Commands sent with run, and changes made by players, are not
+    seen by the cache; call invalidate() after them.
+
+    A BlockCache can be passed in place of a Client to all the build
+    functions, get_block, grab and Blocks.from_volume. Everything else is
+    delegated to the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        max_sections: int = 1024,
+        ttl: Optional[float] = None,
+    ) -> None:
+        self._client = client
+        self.max_sections = max_sections
+        self.ttl = ttl
+        self.palette = Palette()
+        self._sections: "OrderedDict[Key, _Section]" = OrderedDict()
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def invalidate(self, volume: Optional[Volume] = None) -> None:
+        """forget the sections that intersect volume, or everything"""
+        if volume is None:
+            self._sections.clear()
+            return
+
+        for key in list(self._sections):
+            if volume.intersects(_section_volume(key)):
+                del self._sections[key]
+
+    def fill(
+        self,
+        from_: Vec3,
+        to: Vec3,
+        block: str,
+        mode: Optional[FillMode] = None,
+        filter: Optional[str] = None,
+    ) -> str:
+        """fill a region and record it"""
+        result = self._client.fill(from_, to, block, mode, filter)
+
+        vol = Volume.from_corners(from_, to)
+        mode = None if mode is None else FillMode(mode)
+        index = self._index(block)
+        filter_index = None
+        if mode is FillMode.REPLACE and filter is not None:
+            filter_index = self._index(filter)
+            if filter_index == UNKNOWN:
+                index = UNKNOWN  # e.g. a block tag, which we can't evaluate
+
+        self._record((vol.start, vol.end, index, mode, filter_index))
+
+        return result
+
+    def setblock(self, pos: Vec3, block: str, mode: Optional[str] = None) -> str:
+        """set a block and record it"""
+        result = self._client.setblock(pos, block, mode)
+
+        pos = Vec3(*pos).with_ints()
+        keep = FillMode.KEEP if mode == "keep" else None
+        self._record((pos, pos, self._index(block), keep, None))
+
+        return result
+
+    def get_block(self, pos: Vec3) -> Item:
+        """Get the block at the given position."""
+        pos = Vec3(*pos).with_ints()
+        section = self._section(_key(pos), monotonic())
+        _apply(section)
+
+        cell = tuple(int(n) % CHUNK_SIZE for n in pos)
+        index = int(section.cells[cell])
+        if index != UNKNOWN:
+            self.hits += 1
+            return self.palette[index]
+
+        self.misses += 1
+        block = get_block(self._client, pos)
+        section.cells[cell] = self.palette.index(block)
+        section.time = monotonic()
+
+        return block
+
+    def grab_indices(
+        self, vol: Volume, palette: Palette, strategy: Grab = Grab.CELLS
+    ) -> np.ndarray:
+        """
+        copy blocks from a Volume into an array of indices into palette,
+        only reading the blocks that are not cached from the server
+        """
+        cube = self._read(vol)
+        unknown = np.argwhere(cube == UNKNOWN)
+        self.hits += cube.size - len(unknown)
+
+        self.misses += len(unknown)
+        if strategy is Grab.CELLS:
+            for idx in unknown:
+                pos = vol.start + Vec3(*idx)
+                index = self.palette.index(get_block(self._client, pos))
+                self._store(pos, pos, index)
+                cube[tuple(idx)] = index
+        elif len(unknown):
+            # read the box around the unknown cells in one go
+            missing = Volume.from_corners(
+                vol.start + Vec3(*unknown.min(axis=0)),
+                vol.start + Vec3(*unknown.max(axis=0)),
+            )
+            for block, start, end in read_boxes(self._client, missing, strategy):
+                index = self.palette.index(block)
+                self._store(start, end, index)
+                lower, upper = start - vol.start, end - vol.start + 1
+                region = cube[lower.x : upper.x, lower.y : upper.y, lower.z : upper.z]
+                region[region == UNKNOWN] = index
+
+        lookup = np.array([palette.index(item) for item in self.palette])
+        return lookup[cube].astype(palette.dtype)
+
+    def _index(self, block: str) -> int:
+        """the cache palette index of block, UNKNOWN if it isn't an Item"""
+        try:
+            return self.palette.index(block)
+        except ValueError:
+            return UNKNOWN
+
+    def _find(self, key: Key, now: float) -> Optional[_Section]:
+        """find a section and mark it as recently used, expiring it if stale"""
+        section = self._sections.get(key)
+        if section is None:
+            return None
+
+        if self.ttl is not None and now - section.time > self.ttl:
+            del self._sections[key]
+            return None
+
+        self._sections.move_to_end(key)
+        return section
+
+    def _section(self, key: Key, now: float) -> _Section:
+        """find or create a section, evicting the least recently used"""
+        section = self._find(key, now)
+        if section is None:
+            section = self._sections[key] = _Section(key, now)
+            while len(self._sections) > self.max_sections:
+                self._sections.popitem(last=False)
+
+        return section
+
+    def _record(self, fill: Fill) -> None:
+        """queue a fill for each section it touches"""
+        now = monotonic()
+        for key in _section_keys(fill[0], fill[1]):
+            section = self._section(key, now)
+            section.pending.append(fill)
+            section.time = now
+
+    def _read(self, vol: Volume) -> np.ndarray:
+        """the cached indices of vol, UNKNOWN where not cached"""
+        cube = np.full(vol.size.i_tuple, UNKNOWN, dtype=np.int16)
+        now = monotonic()
+        for key in _section_keys(vol.start, vol.end):
+            section = self._find(key, now)
+            if section is None:
+                continue
+            _apply(section)
+            source, target = _overlap(key, vol.start, vol.end, vol.start)
+            cube[target] = section.cells[source]
+
+        return cube
+
+    def _store(self, start: Vec3, end: Vec3, index: int) -> None:
+        """remember that the box from start to end contains index"""
+        now = monotonic()
+        for key in _section_keys(start, end):
+            section = self._section(key, now)
+            _apply(section)
+            source, _ = _overlap(key, start, end, start)
+            section.cells[source] = index
+            section.time = now
+
+
+def _apply(section: _Section) -> None:
+    """expand the fills waiting for a section into its cells, in order"""
+    pending, section.pending = section.pending, []
+
+    for start, end, index, mode, filter_index in pending:
+        source, _ = _overlap(section.key, start, end, start)
+        cells = section.cells[source]
+
+        if index == UNKNOWN:
+            cells[...] = UNKNOWN
+        elif mode is FillMode.KEEP:
+            cells[cells == 0] = index  # unknown cells stay unknown
+        elif filter_index is not None:
+            cells[cells == filter_index] = index
+        elif mode in (FillMode.HOLLOW, FillMode.OUTLINE):
+            base = Vec3(*section.key) * CHUNK_SIZE
+            x, y, z = np.ogrid[source]
+            x, y, z = x + base.x, y + base.y, z + base.z
+            border = (
+                (x == start.x) | (x == end.x)
+                | (y == start.y) | (y == end.y)
+                | (z == start.z) | (z == end.z)
+            )
+            if mode is FillMode.HOLLOW:
+                cells[...] = np.where(border, index, 0)
+            else:
+                cells[border] = index
+        else:
+            cells[...] = index
+
+
+def _key(pos: Vec3) -> Key:
+    """the key of the section containing pos"""
+    x, y, z = (int(n) // CHUNK_SIZE for n in pos)
+    return x, y, z
+
+
+def _section_keys(start: Vec3, end: Vec3) -> List[Key]:
+    """the keys of the sections that intersect the box from start to end"""
+    (x0, y0, z0), (x1, y1, z1) = _key(start), _key(end)
+    return list(product(range(x0, x1 + 1), range(y0, y1 + 1), range(z0, z1 + 1)))
+
+
+def _section_volume(key: Key) -> Volume:
+    """the Volume of a section"""
+    start = Vec3(*key) * CHUNK_SIZE
+    return Volume.from_corners(start, start + (CHUNK_SIZE - 1))
+
+
+def _overlap(
+    key: Key, start: Vec3, end: Vec3, origin: Vec3
+) -> Tuple[Tuple[slice, ...], Tuple[slice, ...]]:
+    """
+    the slices of a section and of an array with its first cell at origin
+    covering the overlap of the section with the box from start to end
+    """
+    base = Vec3(*key) * CHUNK_SIZE
+    lower = Vec3(*np.maximum(start, base))
+    upper = Vec3(*np.minimum(end, base + (CHUNK_SIZE - 1))) + 1
+    source = tuple(slice(low, high) for low, high in zip(lower - base, upper - base))
+    target = tuple(
+        slice(low, high) for low, high in zip(lower - origin, upper - origin)
+    )
+    return source, target
@@ -0,0 +1,109 @@
+"""
+Record the commands of a build and save them as a datapack of mcfunctions
+"""
+import json
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+from mcipc.rcon.functions import str_until_none
+from mcipc.rcon.je.commands.fill import fill
+from mcipc.rcon.je.commands.setblock import setblock
+
+__all__ = ["Recorder"]
+
+# the default value of the maxCommandChainLength gamerule
+MAX_COMMAND_CHAIN_LENGTH = 65536
+
+
+class Recorder:
+    """
+    A command sink that records commands instead of sending them to a server.
+
+    A Recorder can be passed in place of a Client to any of the build
+    functions (make_tunnel, polygon, Volume.fill, Blocks ...). Once the build
+    is recorded, save() writes a datapack that replays it with a single
+    /function call on any server.
+    """
+
+    fill = fill
+    setblock = setblock
+
+    def __init__(self) -> None:
+        self.commands: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.commands)
+
+    def run(self, command: str, *arguments: str) -> str:
+        """record a command, returns an empty response"""
+        self.commands.append(" ".join(str_until_none(command, *arguments)))
+        return ""
+
+    def functions(
+        self,
+        namespace: str = "mcwb",
+        name: str = "build",
+        max_commands: int = MAX_COMMAND_CHAIN_LENGTH,
+    ) -> Dict[str, List[str]]:
+        """
+        split the recorded commands into functions of at most max_commands
+        commands each. The first function is called name, each one schedules
+        the next for the following tick so that no single tick runs more than
+        maxCommandChainLength commands.
+        """
+        if max_commands < 2:
+            raise ValueError("max_commands must allow for the schedule command")
+
+        parts = list(_split(self.commands, max_commands - 1)) or [[]]
+        names = [name] + [f"{name}_{i}" for i in range(1, len(parts))]
+
+        functions = {}
+        for i, part in enumerate(parts):
+            if i + 1 < len(parts):
+                part = part + [f"schedule function {namespace}:{names[i + 1]} 1t"]
+            functions[names[i]] = part
+
+        return functions
+
+    def save(
+        self,
+        path: Union[Path, str],
+        namespace: str = "mcwb",
+        name: str = "build",
+        description: str = "mcwb build",
+        pack_format: int = 10,
+        max_commands: int = MAX_COMMAND_CHAIN_LENGTH,
+    ) -> None:
+        """
+        save the recorded commands as a datapack at path, a directory or a
+        .zip file. Copy it into the datapacks folder of a world and run it
+        with /function namespace:name
+        """
+        path = Path(path)
+        files = {
+            "pack.mcmeta": json.dumps(
+                {"pack": {"pack_format": pack_format, "description": description}},
+                indent=4,
+            )
+        }
+        for function, commands in self.functions(
+            namespace, name, max_commands
+        ).items():
+            filename = f"data/{namespace}/functions/{function}.mcfunction"
+            files[filename] = "".join(command + "\n" for command in commands)
+
+        if path.suffix == ".zip":
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+                for filename, text in files.items():
+                    archive.writestr(filename, text)
+        else:
+            for filename, text in files.items():
+                target = path / filename
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_text(text, encoding="utf-8")
+
+
+def _split(commands: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(commands), size):
+        yield commands[start : start + size]
@@ -0,0 +1,188 @@
+"""
+Keep the chunks that commands touch loaded, however far they are from players
+"""
+import re
+from collections import OrderedDict
+from itertools import groupby, product
+from typing import Any, List, Optional, Set, Tuple
+
+import numpy as np
+from mcipc.rcon.enumerations import FillMode, Item
+from mcipc.rcon.je import Client
+
+from mcwb.api import get_block
+from mcwb.itemlists import grab_indices
+from mcwb.palette import Palette
+from mcwb.types import Grab, Vec3
+from mcwb.volume import CHUNK_SIZE, Volume
+
+__all__ = ["ChunkLoader"]
+
+Chunk = Tuple[int, int]
+
+MAX_FORCELOAD = 256  # the most chunks a forceload command accepts
+
+
+class ChunkLoader:
+    """
+    A Client wrapper that forceloads the chunks each command touches before
+    sending it. Commands sent to unloaded chunks fail (or stall the server
+    while the chunk loads), so large builds far from any player lose blocks.
+
+    At most max_chunks chunks are kept forceloaded at a time, releasing the
+    least recently used first; the build functions send their work in chunk
+    order so that each chunk is loaded once. A single command that touches
+    more chunks than that loads them all. Call close(), or use the loader
+    as a context manager, to release the remaining chunks. Chunks that were
+    already forceloaded when the loader started are left alone.
+
+    A ChunkLoader can be passed in place of a Client to the build functions,
+    get_block, grab and Blocks. grab reads one chunk column at a time.
+    Everything else is delegated to the wrapped client.
+    """
+
+    def __init__(self, client: Client, max_chunks: int = 64) -> None:
+        self._client = client
+        self.max_chunks = max_chunks
+        self._loaded: "OrderedDict[Chunk, None]" = OrderedDict()
+        # chunks forceloaded by others, found on first use
+        self._forced: Optional[Set[Chunk]] = None
+
+        # statistics
+        self.loads = 0
+        self.unloads = 0
+
+    def __enter__(self) -> "ChunkLoader":
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    @property
+    def loaded(self) -> List[Chunk]:
+        """the chunks forceloaded by the loader, least recently used first"""
+        return list(self._loaded)
+
+    def close(self) -> None:
+        """release all the chunks that the loader forceloaded"""
+        self._unload(list(self._loaded))
+
+    def fill(
+        self,
+        from_: Vec3,
+        to: Vec3,
+        block: str,
+        mode: Optional[FillMode] = None,
+        filter: Optional[str] = None,
+    ) -> str:
+        """fill a region once its chunks are loaded"""
+        self._load(from_, to)
+        return self._client.fill(from_, to, block, mode, filter)
+
+    def setblock(self, pos: Vec3, block: str, mode: Optional[str] = None) -> str:
+        """set a block once its chunk is loaded"""
+        self._load(pos, pos)
+        return self._client.setblock(pos, block, mode)
+
+    def get_block(self, pos: Vec3) -> Item:
+        """Get the block at the given position."""
+        self._load(pos, pos)
+        return get_block(self._client, pos)
+
+    def grab_indices(
+        self, vol: Volume, palette: Palette, strategy: Grab = Grab.CELLS
+    ) -> np.ndarray:
+        """
+        copy blocks from a Volume into an array of indices into palette, one
+        chunk column at a time
+        """
+        cube = np.zeros(vol.size.i_tuple, dtype=np.uint16)
+        for column in vol.chunks():
+            self._load(column.start, column.end)
+            part = grab_indices(self._client, column, palette, strategy)
+            cube[column.slices(vol.start)] = part
+
+        return cube.astype(palette.dtype)
+
+    def _load(self, start: Vec3, end: Vec3) -> None:
+        """forceload the chunks from start to end, releasing old ones"""
+        (x0, z0), (x1, z1) = _chunk(start), _chunk(end)
+        needed = list(
+            product(
+                range(min(x0, x1), max(x0, x1) + 1),
+                range(min(z0, z1), max(z0, z1) + 1),
+            )
+        )
+
+        if self._forced is None:
+            reply = self._client.run("forceload", "query")
+            self._forced = {
+                (int(x), int(z)) for x, z in re.findall(r"\[(-?\d+), (-?\d+)\]", reply)
+            }
+        needed = [chunk for chunk in needed if chunk not in self._forced]
+
+        missing = []
+        for chunk in needed:
+            if chunk in self._loaded:
+                self._loaded.move_to_end(chunk)
+            else:
+                missing.append(chunk)
+        if not missing:
+            return
+
+        # release the least recently used chunks, the chunks this command
+        # needs were just moved to the end
+        excess = len(self._loaded) + len(missing) - self.max_chunks
+        unneeded = len(self._loaded) - (len(needed) - len(missing))
+        if excess > 0:
+            self._unload(list(self._loaded)[: min(excess, unneeded)])
+
+        for first, last in _runs(missing):
+            self._client.run("forceload", "add", *_corners(first, last))
+        for chunk in missing:
+            self._loaded[chunk] = None
+        self.loads += len(missing)
+
+    def _unload(self, chunks: List[Chunk]) -> None:
+        for first, last in _runs(sorted(chunks)):
+            self._client.run("forceload", "remove", *_corners(first, last))
+        for chunk in chunks:
+            del self._loaded[chunk]
+        self.unloads += len(chunks)
+
+
+def _chunk(pos: Vec3) -> Chunk:
+    """the chunk containing pos"""
+    pos = Vec3(*pos).with_ints()
+    return int(pos.x) // CHUNK_SIZE, int(pos.z) // CHUNK_SIZE
+
+
+def _runs(chunks: List[Chunk]) -> List[Tuple[Chunk, Chunk]]:
+    """
+    group sorted chunks into lines along z, one forceload command each, of
+    at most MAX_FORCELOAD chunks
+    """
+    runs = []
+    for x, line in groupby(chunks, key=lambda chunk: chunk[0]):
+        zs = [z for _, z in line]
+        first = zs[0]
+        for previous, z in zip(zs, zs[1:]):
+            if z != previous + 1 or z - first == MAX_FORCELOAD:
+                runs.append(((x, first), (x, previous)))
+                first = z
+        runs.append(((x, first), (x, zs[-1])))
+
+    return runs
+
+
+def _corners(first: Chunk, last: Chunk) -> Tuple[int, int, int, int]:
+    """the block coordinates (x z x z) for forceload of a line of chunks"""
+    return (
+        first[0] * CHUNK_SIZE,
+        first[1] * CHUNK_SIZE,
+        last[0] * CHUNK_SIZE,
+        last[1] * CHUNK_SIZE,
+    )
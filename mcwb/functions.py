@@ -1,38 +1,56 @@
 """Helper functions."""
 
-from typing import Iterator, Union
+from itertools import product
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import typing
 
 import numpy as np
 from mcipc.rcon.enumerations import Item
 
-from mcwb.types import Anchor, Direction, Items, Number, Offsets, Profile, Row, Vec3
+from mcwb.palette import air_value
+from mcwb.types import Anchor, Direction, Items, Offsets, Profile, Row, Vec3
 
-__all__ = ["get_direction", "normalize", "offsets", "validate"]
+__all__ = [
+    "boxes",
+    "get_direction",
+    "normalize",
+    "offset_array",
+    "offsets",
+    "rectangles",
+    "split_box",
+    "unpack_bits",
+    "validate",
+]
 
+MAX_MINECRAFT_FILL_COMMAND = 32768
+CHUNK_SIZE = 16  # the x and z dimensions of a minecraft chunk
 
-def _get_offset(
-    direction: Vec3, x_start: Number, y_start: Number, delta_y: Number, delta_xz: Number
-) -> Vec3:
-    """Returns the offset for a given direction."""
+# the pieces an axis is cut into: number of pieces, longest piece, aligned
+_Cut = Tuple[int, int, bool]
 
+
+def _orientation(direction: Vec3) -> np.ndarray:
+    """
+    the matrix that maps (across, down) offsets in a profile facing direction
+    to x, y, z offsets
+    """
     if direction.north:
-        return Vec3(-x_start + delta_xz, y_start - delta_y, 0)
+        return np.array([[-1, 0], [0, 1], [0, 0]])
 
     if direction.south:
-        return Vec3(x_start - delta_xz, y_start - delta_y, 0)
+        return np.array([[1, 0], [0, 1], [0, 0]])
 
     if direction.east:
-        return Vec3(0, y_start - delta_y, -x_start + delta_xz)
+        return np.array([[0, 0], [0, 1], [-1, 0]])
 
     if direction.west:
-        return Vec3(0, y_start - delta_y, x_start - delta_xz)
+        return np.array([[0, 0], [0, 1], [1, 0]])
 
     if direction.up:
-        return Vec3(-x_start + delta_xz, 0, y_start - delta_y)
+        return np.array([[-1, 0], [0, 0], [0, 1]])
 
     if direction.down:
-        return Vec3(-x_start + delta_xz, 0, -y_start + delta_y)
+        return np.array([[-1, 0], [0, 0], [0, -1]])
 
     raise ValueError("Cannot determine offset.")
 
@@ -68,8 +86,22 @@ def normalize(
 def offsets(profile: Profile, direction: Vec3, anchor: Anchor) -> Offsets:
     """Yields block offsets dependent on the given direction."""
 
-    height = len(profile)
-    width = len(profile[0])
+    shape = (len(profile), len(profile[0]))
+    cells = offset_array(shape, direction, anchor).reshape(-1, 3).tolist()
+    blocks = (block for row in profile for block in row)
+
+    for block, offset in zip(blocks, cells):
+        yield (block, Vec3(*offset))
+
+
+def offset_array(
+    shape: Tuple[int, int], direction: Vec3, anchor: Anchor
+) -> np.ndarray:
+    """
+    the offsets of all the cells of a profile of shape (height, width) as a
+    (height, width, 3) array, see offsets
+    """
+    height, width = shape
     x_start = y_start = 0
 
     if anchor in {Anchor.BOTTOM_LEFT, Anchor.BOTTOM_RIGHT}:
@@ -80,10 +112,9 @@ def offsets(profile: Profile, direction: Vec3, anchor: Anchor) -> Offsets:
         x_start = int(width / 2)
         y_start = int(height / 2)
 
-    for delta_y, row in enumerate(profile):
-        for delta_xz, block in enumerate(row):
-            vec3 = _get_offset(direction, x_start, y_start, delta_y, delta_xz)
-            yield (block, vec3)
+    delta_y, delta_xz = np.indices(shape)
+    plane = np.stack((x_start - delta_xz, y_start - delta_y), axis=-1)
+    return plane @ _orientation(direction).T
 
 
 def validate(items: Items):
@@ -105,14 +136,18 @@ def validate(items: Items):
 #   for "ndarray[Any, Any]"; expected type "ndarray[tuple[int, ...], dtype[integer[Any] | numpy.bool[builtins.bool]]] 
 #   | tuple[ndarray[tuple[int, ...], dtype[integer[Any] | numpy.bool[builtins.bool]]], ...]"  [index]
 @typing.no_type_check
-def shift(arr: np.ndarray, vec: Vec3, fill: Item = Item.AIR) -> np.ndarray:
-    """shift a 3d array of Item by vec, discarding the cells that are
-    shifted out and filling the new space with Item fill
+def shift(
+    arr: np.ndarray, vec: Vec3, fill: Optional[Union[Item, int]] = None
+) -> np.ndarray:
+    """shift a 3d array of Item or palette indices by vec, discarding the cells
+    that are shifted out and filling the new space with fill (default AIR)
     """
+    if fill is None:
+        fill = air_value(arr)
 
     # this is the fastest approach in python, see 1d Benchmark at
     # https://stackoverflow.com/questions/30399534/shift-elements-in-a-numpy-array
-    result: np.ndarray = np.array(np.full_like(arr, fill), dtype=Item)
+    result: np.ndarray = np.full_like(arr, fill)
     if vec.y > 0:
         result[:, : vec.y, :] = fill
         result[:, vec.y :, :] = arr[:, : -vec.y, :]
@@ -133,3 +168,209 @@ def shift(arr: np.ndarray, vec: Vec3, fill: Item = Item.AIR) -> np.ndarray:
         result[:, :, : vec.z] = arr[:, :, -vec.z :]
 
     return result
+
+
+def boxes(
+    arr: np.ndarray,
+    mask: Optional[np.ndarray] = None,
+    max_volume: int = MAX_MINECRAFT_FILL_COMMAND,
+) -> Iterator[Tuple[Any, Vec3, Vec3]]:
+    """
+    Greedily decompose a 3d array into axis aligned boxes of identical values.
+
+    Yields (value, start, end) where start and end are the inclusive indices
+    of opposite corners. Only the cells selected by mask are covered and no
+    box contains more than max_volume cells, so each box can be rendered
+    with a single fill command: boxes that are too large are cut up with
+    split_box.
+    """
+    todo = np.ones(arr.shape, dtype=bool) if mask is None else np.array(mask, bool)
+    size_x, size_y, _ = arr.shape
+
+    for x, y, z in np.argwhere(todo):
+        if not todo[x, y, z]:
+            continue  # already covered by an earlier box
+        value = arr[x, y, z]
+
+        # extend along z as far as the values match
+        row = todo[x, y, z:] & (arr[x, y, z:] == value)
+        z_len = int(np.argmin(row)) if not row.all() else len(row)
+
+        # extend along y while the whole row matches
+        y_len = 1
+        while (
+            y + y_len < size_y
+            and todo[x, y + y_len, z : z + z_len].all()
+            and (arr[x, y + y_len, z : z + z_len] == value).all()
+        ):
+            y_len += 1
+
+        # extend along x while the whole plane matches
+        x_len = 1
+        while (
+            x + x_len < size_x
+            and todo[x + x_len, y : y + y_len, z : z + z_len].all()
+            and (arr[x + x_len, y : y + y_len, z : z + z_len] == value).all()
+        ):
+            x_len += 1
+
+        todo[x : x + x_len, y : y + y_len, z : z + z_len] = False
+        start = Vec3(int(x), int(y), int(z))
+        end = Vec3(int(x + x_len - 1), int(y + y_len - 1), int(z + z_len - 1))
+        for lower, upper in split_box(start, end, max_volume):
+            yield value, lower, upper
+
+
+def rectangles(
+    arr: np.ndarray, max_area: int = MAX_MINECRAFT_FILL_COMMAND
+) -> Iterator[Tuple[Any, Tuple[int, int], Tuple[int, int]]]:
+    """
+    Greedily decompose a 2d array into rectangles of identical values.
+
+    Yields (value, first, last) where first and last are the inclusive
+    (row, column) indices of opposite corners, no rectangle holding more
+    than max_area cells. Runs of equal values along each row are found with
+    numpy and then stacked with identical runs in the rows below, which is
+    much faster than boxes for a profile.
+    """
+    rows, columns = arr.shape
+    if arr.size == 0:
+        return
+
+    # the first cell of each run and the last cell of the same run
+    change = np.ones(arr.shape, dtype=bool)
+    change[:, 1:] = arr[:, 1:] != arr[:, :-1]
+    run_rows, firsts = np.nonzero(change)
+    same_row = np.append(run_rows[1:] == run_rows[:-1], False)
+    lasts = np.where(same_row, np.append(firsts[1:], 0), columns) - 1
+
+    # (first column, last column, value) -> (first row, last row) of the
+    # rectangle that the runs below can still extend
+    open_: Dict[Tuple[int, int, Any], Tuple[int, int]] = {}
+    for row, first, last, value in zip(
+        run_rows.tolist(), firsts.tolist(), lasts.tolist(), arr[change].tolist()
+    ):
+        pieces = [(first, last)]
+        if last - first >= max_area:
+            starts = range(first, last + 1, max_area)
+            pieces = [(low, min(low + max_area - 1, last)) for low in starts]
+        for low, high in pieces:
+            key = (low, high, value)
+            top, bottom = open_.get(key, (row, row - 1))
+            if bottom != row - 1 or (row - top + 1) * (high - low + 1) > max_area:
+                if bottom >= top:
+                    yield value, (top, low), (bottom, high)
+                top = row
+            open_[key] = (top, row)
+
+    for (low, high, value), (top, bottom) in open_.items():
+        yield value, (top, low), (bottom, high)
+
+
+def split_box(
+    start: Vec3, end: Vec3, max_volume: int = MAX_MINECRAFT_FILL_COMMAND
+) -> Iterator[Tuple[Vec3, Vec3]]:
+    """
+    Split the box between opposite corners start and end into the fewest
+    boxes of no more than max_volume blocks, yielded as (start, end) pairs.
+
+    Every way of cutting the x and z axes into pieces is tried, with the
+    y axis then cut into as few pieces as the volume limit allows. Among
+    plans with the fewest boxes, cuts on chunk boundaries are preferred so
+    that each fill touches as few chunks as possible.
+    """
+    start, end = Vec3(*start).with_ints(), Vec3(*end).with_ints()
+    x_low, x_high = sorted((int(start.x), int(end.x)))
+    y_low, y_high = sorted((int(start.y), int(end.y)))
+    z_low, z_high = sorted((int(start.z), int(end.z)))
+    size = Vec3(x_high - x_low, y_high - y_low, z_high - z_low) + 1
+    if size.volume <= max_volume:
+        yield Vec3(x_low, y_low, z_low), Vec3(x_high, y_high, z_high)
+        return
+
+    best: Optional[Tuple[int, int, _Cut, _Cut, _Cut]] = None
+    z_cuts = _cuts(z_low, z_high, max_volume)
+    for x_cut in _cuts(x_low, x_high, max_volume):
+        for z_cut in z_cuts:
+            if best is not None and x_cut[0] * z_cut[0] > best[0]:
+                break  # z_cuts is ordered by the number of pieces
+            area = x_cut[1] * z_cut[1]
+            if area > max_volume:
+                continue
+            y_cut = (-(-int(size.y) // (max_volume // area)), 0, False)
+            count = x_cut[0] * y_cut[0] * z_cut[0]
+            plan = (count, -(x_cut[2] + z_cut[2]), x_cut, y_cut, z_cut)
+            if best is None or plan[:2] < best[:2]:
+                best = plan
+
+    assert best is not None  # cutting every axis into single blocks always fits
+    # y innermost, so that each chunk column is finished before the next
+    _, _, x_cut, y_cut, z_cut = best
+    for (x0, x1), (z0, z1), (y0, y1) in product(
+        _pieces(x_low, x_high, x_cut),
+        _pieces(z_low, z_high, z_cut),
+        _pieces(y_low, y_high, y_cut),
+    ):
+        yield Vec3(x0, y0, z0), Vec3(x1, y1, z1)
+
+
+def _cuts(low: int, high: int, limit: int) -> List[_Cut]:
+    """
+    the useful ways to cut an axis from low to high into pieces no longer
+    than limit: for each number of pieces the shortest longest piece, both
+    splitting evenly and splitting on chunk boundaries
+    """
+    size = high - low + 1
+    even: Dict[int, int] = {}
+    aligned: Dict[int, int] = {}
+
+    length = min(size, limit)
+    while length >= 1:
+        pieces = -(-size // length)
+        even[pieces] = -(-size // pieces)
+        length = -(-size // pieces) - 1 if pieces < size else 0
+
+    for length in range(CHUNK_SIZE, min(size + CHUNK_SIZE, limit + 1), CHUNK_SIZE):
+        pieces = high // length - low // length + 1
+        aligned.setdefault(pieces, length)
+
+    cuts = [(pieces, length, False) for pieces, length in even.items()]
+    cuts += [(pieces, length, True) for pieces, length in aligned.items()]
+    return sorted(cuts)
+
+
+def _pieces(low: int, high: int, cut: _Cut) -> List[Tuple[int, int]]:
+    """the first and last coordinates of the pieces of an axis"""
+    pieces, length, aligned = cut
+    if aligned:
+        starts = [low] + list(range((low // length + 1) * length, high + 1, length))
+    else:
+        size = high - low + 1
+        starts = [low + size * i // pieces for i in range(pieces)]
+
+    return list(zip(starts, [n - 1 for n in starts[1:]] + [high]))
+
+
+def unpack_bits(longs: np.ndarray, bits: int, count: int, spanning: bool) -> np.ndarray:
+    """
+    unpack count unsigned values of bits width from an array of 64 bit
+    longs, lowest bits first. If spanning, the values form a continuous
+    stream of bits and may cross from one long into the next, otherwise
+    each long holds 64 // bits values and the remaining bits are unused.
+    """
+    longs = np.asarray(longs).astype(np.int64).view(np.uint64)
+    mask = np.uint64((1 << bits) - 1)
+
+    if spanning:
+        position = np.arange(count, dtype=np.uint64) * np.uint64(bits)
+        index = (position >> np.uint64(6)).astype(np.intp)
+        offset = position & np.uint64(63)
+        padded = np.append(longs, np.uint64(0))
+        # shift the next long in two steps, a shift by 64 is undefined
+        high = (padded[index + 1] << (np.uint64(63) - offset)) << np.uint64(1)
+        values = (padded[index] >> offset) | high
+    else:
+        shifts = np.arange(64 // bits, dtype=np.uint64) * np.uint64(bits)
+        values = (longs[:, None] >> shifts).reshape(-1)[:count]
+
+    return (values & mask).astype(np.uint32)
@@ -7,46 +7,98 @@ Functions for manipulating lists of Items
 
 import codecs
 import json
+from itertools import product
 from pathlib import Path
-from typing import Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-from numpy.typing import NDArray
 from mcipc.rcon.enumerations import Item
 from mcipc.rcon.je import Client
 
-from mcwb.api import get_block
-from mcwb.functions import validate
-from mcwb.types import Cuboid, Items, Vec3
+from mcwb.api import get_block, is_uniform
+from mcwb.archive import ARCHIVE_SUFFIX, is_archive, load_archive, save_archive
+from mcwb.binary import SUFFIX, is_binary, load_indices, save_indices
+from mcwb.functions import MAX_MINECRAFT_FILL_COMMAND, validate
+from mcwb.palette import Palette
+from mcwb.types import Cuboid, Grab, Items, Vec3
 from mcwb.volume import Volume
 
 ITEM_KEY = "__Item__"
 
+# the json.dump arguments for saving Items
+_JSON_FORMAT: Dict[str, Any] = dict(separators=(",", ":"), sort_keys=True, indent=4)
 
-def save_items(items: Items, filename: Path) -> None:
-    """save a Profile, Cuboid or Row to a json file"""
 
-    if isinstance(items, np.ndarray):
-        items = items.tolist() # type: ignore
+def _json_item(item: Item):
+    return {ITEM_KEY: item.value}
 
-    def json_item(item: Item):
-        return {ITEM_KEY: item.value}
+
+def save_items(
+    items: Items,
+    filename: Path,
+    binary: Optional[bool] = None,
+    compress: bool = False,
+) -> None:
+    """
+    save a Profile, Cuboid or Row to a json file, or to the compact binary
+    format (see mcwb.binary) if binary is True or, by default, if filename
+    ends with .mcwb. compress only applies to the binary format.
+    A filename ending with .mcwa selects the chunked archive format (see
+    mcwb.archive).
+    """
+    if binary is None:
+        binary = Path(filename).suffix == SUFFIX
 
     if validate(items) == 0:
         raise ValueError("items is not a valid Row, Profile or Cuboid")
 
+    if Path(filename).suffix == ARCHIVE_SUFFIX:
+        palette = Palette()
+        save_archive(palette.encode(items), palette, filename)
+        return
+
+    if binary:
+        palette = Palette()
+        save_indices(palette.encode(items), palette, filename, compress)
+        return
+
+    if isinstance(items, np.ndarray):
+        items = items.tolist() # type: ignore
+
     json.dump(
         items,
         codecs.open(str(filename), "w", encoding="utf-8"),
-        separators=(",", ":"),
-        sort_keys=True,
-        indent=4,
-        default=json_item,
+        default=_json_item,
+        **_JSON_FORMAT,
     )
 
 
+def save_slices(profiles: Iterable[Items], filename: Path) -> None:
+    """
+    save a Cuboid to a json file one Profile at a time, so that the whole
+    Cuboid is never held in memory. The file is the same as save_items
+    writes. Use with grab_slices(..., axis=0)
+    """
+    with codecs.open(str(filename), "w", encoding="utf-8") as file:
+        separator = "["
+        for profile in profiles:
+            if isinstance(profile, np.ndarray):
+                profile = profile.tolist()
+            if validate(profile) != 2:
+                raise ValueError("profile is not a valid Profile")
+
+            # indent each Profile by one level as json.dump does for a Cuboid
+            text = json.dumps(profile, default=_json_item, **_JSON_FORMAT)
+            file.write(separator + "\n    " + text.replace("\n", "\n    "))
+            separator = ","
+        file.write("[]" if separator == "[" else "\n]")
+
+
 def load_items(filename: Union[Path, str], dimensions: int = 0) -> Items:
-    """load a JSON file of Items - returns a Cuboid, Profile or Row"""
+    """
+    load a JSON, binary or archive file of Items - returns a Cuboid, Profile
+    or Row, as nested lists for JSON and as a numpy array otherwise
+    """
 
     def as_item(dct: dict):
         if ITEM_KEY in dct:
@@ -54,9 +106,16 @@ def load_items(filename: Union[Path, str], dimensions: int = 0) -> Items:
 
         return dct
 
-    result = json.load(
-        codecs.open(str(filename), "r", encoding="utf-8"), object_hook=as_item
-    )
+    if is_binary(filename):
+        palette = Palette()
+        result = palette.decode(load_indices(filename, palette))
+    elif is_archive(filename):
+        palette = Palette()
+        result = palette.decode(load_archive(filename, palette))
+    else:
+        result = json.load(
+            codecs.open(str(filename), "r", encoding="utf-8"), object_hook=as_item
+        )
     valid_dims = validate(result)
 
     if valid_dims == 0:
@@ -71,12 +130,104 @@ def load_items(filename: Union[Path, str], dimensions: int = 0) -> Items:
     return result
 
 
-def grab(client: Client, vol: Volume) -> Cuboid:
+def grab(client: Client, vol: Volume, strategy: Grab = Grab.CELLS) -> Cuboid:
     """copy blocks from a Volume in the minecraft world into a cuboid of Item"""
-    cube: NDArray[Item] = np.ndarray(vol.size.i_tuple, dtype=Item)
-
-    for idx, _ in np.ndenumerate(cube):
-        cube[idx] = get_block(client, vol.start + Vec3(*idx))
+    palette = Palette()
+    result = grab_indices(client, vol, palette, strategy)
+
+    return palette.decode(result).tolist()  # type: ignore
+
+
+def grab_indices(
+    client: Client, vol: Volume, palette: Palette, strategy: Grab = Grab.CELLS
+) -> np.ndarray:
+    """
+    copy blocks from a Volume in the minecraft world into an array of
+    indices into palette
+    """
+    # clients that can read whole volumes more efficiently (e.g. ClientPool)
+    reader = getattr(client, "grab_indices", None)
+    if reader is not None:
+        return reader(vol, palette, strategy)
+
+    cube = np.zeros(vol.size.i_tuple, dtype=np.uint16)
+
+    for block, start, end in read_boxes(client, vol, strategy):
+        lower, upper = start - vol.start, end - vol.start + 1
+        cube[lower.x : upper.x, lower.y : upper.y, lower.z : upper.z] = (
+            palette.index(block)
+        )
 
-    result = cube.tolist()
-    return result # type: ignore
+    return cube.astype(palette.dtype)
+
+
+def grab_slices(
+    client: Client,
+    vol: Volume,
+    axis: int = 1,
+    strategy: Grab = Grab.CELLS,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Iterator[np.ndarray]:
+    """
+    copy blocks from a Volume in the minecraft world one slice at a time,
+    yielding a 2d array of Item for each slice as soon as it is read. Only
+    one slice is held in memory. axis 1 (the default) yields horizontal
+    layers from the bottom up, axis 0 yields Profiles of the Cuboid that
+    grab would return, for use with save_slices.
+
+    progress is called with the number of slices read and the total.
+    """
+    count = vol.size[axis]
+    for i in range(count):
+        step = Vec3(*(i if n == axis else 0 for n in range(3)))
+        thickness = Vec3(*(0 if n == axis else vol.size[n] - 1 for n in range(3)))
+        start = vol.start + step
+        layer = Volume.from_corners(start, start + thickness)
+
+        palette = Palette()
+        indices = grab_indices(client, layer, palette, strategy)
+
+        if progress is not None:
+            progress(i + 1, count)
+        yield palette.decode(indices.squeeze(axis))
+
+
+def read_boxes(
+    client: Client, vol: Volume, strategy: Grab = Grab.CELLS
+) -> Iterator[Tuple[Item, Vec3, Vec3]]:
+    """
+    read the blocks of a Volume as boxes of a single block type, yields
+    (block, start, end) with inclusive world coordinates
+    """
+    if strategy is Grab.CELLS:
+        for idx in np.ndindex(*vol.size.i_tuple):
+            pos = vol.start + Vec3(*idx)
+            yield get_block(client, pos), pos, pos
+        return
+
+    # octree: only split the boxes that are not uniform
+    stack = [(vol.start, vol.end)]
+    while stack:
+        start, end = stack.pop()
+        size = end - start + 1
+        if start == end or (
+            size.volume <= MAX_MINECRAFT_FILL_COMMAND
+            and is_uniform(client, start, end)
+        ):
+            yield get_block(client, start), start, end
+        else:
+            stack.extend(_octants(start, end))
+
+
+def _octants(start: Vec3, end: Vec3) -> List[Tuple[Vec3, Vec3]]:
+    """split a box in half along each axis that is longer than one block"""
+    middle = start + (end - start) // 2
+    halves = [
+        [(s, m), (m + 1, e)] if s < e else [(s, e)]
+        for s, m, e in zip(start, middle, end)
+    ]
+
+    return [
+        (Vec3(x[0], y[0], z[0]), Vec3(x[1], y[1], z[1]))
+        for x, y, z in product(*halves)
+    ]
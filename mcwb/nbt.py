@@ -0,0 +1,208 @@
+"""
+Read and write Minecraft's Named Binary Tag (NBT) format
+
+Tags are represented by python values:
+    Compound = dict, List = list, String = str,
+    Byte / Short / Int / Long = the int subclasses below (int is written as Int),
+    Float / Double = the float subclasses below (float is written as Double),
+    ByteArray / IntArray / LongArray = numpy arrays of int8 / int32 / int64
+"""
+import gzip
+import struct
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Tuple, Union
+
+import numpy as np
+
+__all__ = [
+    "Byte",
+    "Double",
+    "Float",
+    "Int",
+    "Long",
+    "Short",
+    "load",
+    "loads",
+    "save",
+    "dumps",
+]
+
+END, BYTE, SHORT, INT, LONG, FLOAT, DOUBLE = range(7)
+BYTE_ARRAY, STRING, LIST, COMPOUND, INT_ARRAY, LONG_ARRAY = range(7, 13)
+
+
+class Byte(int):
+    """an NBT byte"""
+
+
+class Short(int):
+    """an NBT short"""
+
+
+class Int(int):
+    """an NBT int"""
+
+
+class Long(int):
+    """an NBT long"""
+
+
+class Float(float):
+    """an NBT float"""
+
+
+class Double(float):
+    """an NBT double"""
+
+
+# tag id -> (python type, struct format) for the fixed size numeric tags
+_NUMBERS: Dict[int, Tuple[type, struct.Struct]] = {
+    BYTE: (Byte, struct.Struct(">b")),
+    SHORT: (Short, struct.Struct(">h")),
+    INT: (Int, struct.Struct(">i")),
+    LONG: (Long, struct.Struct(">q")),
+    FLOAT: (Float, struct.Struct(">f")),
+    DOUBLE: (Double, struct.Struct(">d")),
+}
+
+# tag id -> big endian element type for the array tags
+_ARRAYS: Dict[int, np.dtype] = {
+    BYTE_ARRAY: np.dtype(">i1"),
+    INT_ARRAY: np.dtype(">i4"),
+    LONG_ARRAY: np.dtype(">i8"),
+}
+
+_TYPES = {typ: tag for tag, (typ, _) in _NUMBERS.items()}
+
+
+def _tag_of(value: Any) -> int:
+    """the tag id used to write value"""
+    tag = _TYPES.get(type(value))
+    if tag is not None:
+        return tag
+    if isinstance(value, (bool, np.bool_, np.int8, np.uint8)):
+        return BYTE
+    if isinstance(value, (int, np.integer)):
+        return INT
+    if isinstance(value, (float, np.floating)):
+        return DOUBLE
+    if isinstance(value, str):
+        return STRING
+    if isinstance(value, dict):
+        return COMPOUND
+    if isinstance(value, (list, tuple)):
+        return LIST
+    if isinstance(value, np.ndarray):
+        for tag, dtype in _ARRAYS.items():
+            if value.dtype.itemsize == dtype.itemsize:
+                return tag
+    raise TypeError(f"can't represent {type(value).__name__} as NBT")
+
+
+class _Reader:
+    def __init__(self, data: bytes) -> None:
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def take(self, size: int) -> memoryview:
+        chunk = self.data[self.pos : self.pos + size]
+        if len(chunk) < size:
+            raise ValueError("truncated NBT data")
+        self.pos += size
+        return chunk
+
+    def number(self, tag: int) -> Any:
+        typ, fmt = _NUMBERS[tag]
+        return typ(fmt.unpack(self.take(fmt.size))[0])
+
+    def string(self) -> str:
+        length = self.number(SHORT)
+        return str(self.take(length), "utf-8")
+
+    def payload(self, tag: int) -> Any:
+        if tag in _NUMBERS:
+            return self.number(tag)
+        if tag in _ARRAYS:
+            dtype = _ARRAYS[tag]
+            length = self.number(INT)
+            # native byte order so that the result works with all of numpy
+            data = np.frombuffer(self.take(length * dtype.itemsize), dtype=dtype)
+            return data.astype(dtype.newbyteorder("="))
+        if tag == STRING:
+            return self.string()
+        if tag == LIST:
+            element = self.number(BYTE)
+            return [self.payload(element) for _ in range(self.number(INT))]
+        if tag == COMPOUND:
+            result = {}
+            while (child := self.number(BYTE)) != END:
+                name = self.string()
+                result[name] = self.payload(child)
+            return result
+        raise ValueError(f"unknown NBT tag {tag}")
+
+
+def _writer(out: BinaryIO) -> Callable[[int, Any], None]:
+    def string(value: str) -> None:
+        data = value.encode("utf-8")
+        out.write(struct.pack(">H", len(data)))
+        out.write(data)
+
+    def payload(tag: int, value: Any) -> None:
+        if tag in _NUMBERS:
+            out.write(_NUMBERS[tag][1].pack(value))
+        elif tag in _ARRAYS:
+            out.write(struct.pack(">i", len(value)))
+            out.write(np.asarray(value, dtype=_ARRAYS[tag]).tobytes())
+        elif tag == STRING:
+            string(value)
+        elif tag == LIST:
+            element = _tag_of(value[0]) if len(value) else END
+            out.write(struct.pack(">bi", element, len(value)))
+            for item in value:
+                payload(element, item)
+        elif tag == COMPOUND:
+            for name, child in value.items():
+                child_tag = _tag_of(child)
+                out.write(struct.pack(">b", child_tag))
+                string(name)
+                payload(child_tag, child)
+            out.write(b"\0")
+
+    return payload
+
+
+def loads(data: bytes) -> Dict[str, Any]:
+    """parse an NBT document (gzipped or not) and return its root compound"""
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+
+    reader = _Reader(data)
+    if reader.number(BYTE) != COMPOUND:
+        raise ValueError("the root of an NBT document must be a compound")
+    reader.string()  # the root name, always empty in practice
+
+    return reader.payload(COMPOUND)
+
+
+def dumps(root: Dict[str, Any], compress: bool = True) -> bytes:
+    """serialize a root compound to an NBT document, gzipped by default"""
+    out = BytesIO()
+    out.write(b"\x0a\x00\x00")  # an unnamed root compound
+    _writer(out)(COMPOUND, root)
+
+    data = out.getvalue()
+    return gzip.compress(data) if compress else data
+
+
+def load(filename: Union[Path, str]) -> Dict[str, Any]:
+    """read an NBT file"""
+    return loads(Path(filename).read_bytes())
+
+
+def save(
+    root: Dict[str, Any], filename: Union[Path, str], compress: bool = True
+) -> None:
+    """write an NBT file"""
+    Path(filename).write_bytes(dumps(root, compress))
@@ -0,0 +1,77 @@
+"""
+Compact storage of Items as small integers indexing a palette of Items
+"""
+from typing import Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.types import Items
+
+__all__ = ["Palette", "air_value"]
+
+
+class Palette:
+    """
+    An ordered collection of distinct Items. An array of Items is stored as
+    an array of indices into the palette, which takes 1 or 2 bytes per cell
+    instead of an object pointer and allows vectorized integer comparisons.
+
+    Index 0 is always AIR so that a mask of solid blocks is simply
+    indices != 0.
+    """
+
+    def __init__(self, items: Iterable[Item] = ()) -> None:
+        self.items: List[Item] = []
+        self._indices: Dict[Item, int] = {}
+
+        self.index(Item.AIR)
+        for item in items:
+            self.index(item)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Item]:
+        return iter(self.items)
+
+    def __getitem__(self, index: int) -> Item:
+        return self.items[index]
+
+    @property
+    def dtype(self) -> type:
+        """the smallest integer type that can index the palette"""
+        return np.uint8 if len(self.items) <= 256 else np.uint16
+
+    def index(self, item: Union[Item, str]) -> int:
+        """return the index of item, adding it to the palette if required"""
+        item = Item(item)  # ensure enum
+        index = self._indices.get(item)
+
+        if index is None:
+            index = self._indices[item] = len(self.items)
+            self.items.append(item)
+
+        return index
+
+    def encode(self, items: Items) -> np.ndarray:
+        """convert a Row, Profile or Cuboid of Items into palette indices"""
+        cube = np.asarray(items, dtype=Item)
+
+        if cube.size == 0:
+            return np.zeros(cube.shape, dtype=self.dtype)
+
+        # only look up each distinct Item once, the rest is vectorized
+        uniques, inverse = np.unique(cube, return_inverse=True)
+        lookup = np.array([self.index(item) for item in uniques])
+
+        return lookup[inverse].reshape(cube.shape).astype(self.dtype)
+
+    def decode(self, indices: np.ndarray) -> np.ndarray:
+        """convert an array of palette indices into an array of Item"""
+        return np.array(self.items, dtype=Item)[indices]
+
+
+def air_value(arr: np.ndarray) -> Union[Item, int]:
+    """the value representing AIR in an array of Item or of palette indices"""
+    return Item.AIR if arr.dtype == object else 0
@@ -0,0 +1,123 @@
+"""
+Send many RCON commands over one connection without waiting for each reply
+"""
+from itertools import count
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcipc.rcon.errors import check_result
+from mcipc.rcon.functions import str_until_none
+from mcipc.rcon.je import Client
+from mcipc.rcon.je.commands.fill import fill
+from mcipc.rcon.je.commands.setblock import setblock
+from rcon.exceptions import SessionTimeout
+from rcon.source.proto import LittleEndianSignedInt32, Packet, Type
+
+__all__ = ["Pipeline"]
+
+
+class Pipeline:
+    """
+    A command sink that pipelines commands over the connection of a logged
+    in Client. Up to window commands are in flight at once and each reply is
+    matched to its command by request id, so throughput is no longer bound
+    by the round trip time to the server.
+
+    A Pipeline can be passed in place of a Client to any of the build
+    functions (make_tunnel, polygon, Volume.fill, Blocks ...). The world
+    modifying commands fill and setblock are queued and return an empty
+    response. Accessing anything else flushes the pipeline and delegates to
+    the wrapped client.
+
+    Replies that report an error are collected in errors, flush() raises the
+    first of these once all replies have been received.
+    """
+
+    fill = fill
+    setblock = setblock
+
+    def __init__(self, client: Client, window: int = 64, encoding: str = "utf-8"):
+        self._client = client
+        self._socket = client._socket  # pylint: disable=W0212
+        # a single buffered reader so that replies read ahead are not lost
+        self._reader = self._socket.makefile("rb")
+        self._ids = count(1)
+        self._pending: Dict[int, str] = {}  # request id -> command
+
+        self.window = window
+        self.encoding = encoding
+        self.sent = 0
+        self.errors: List[Tuple[str, Exception]] = []
+
+    def __enter__(self) -> "Pipeline":
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        if typ is None:
+            self.flush()
+        else:
+            self._drain()
+
+    def __getattr__(self, name: str) -> Any:
+        self.flush()
+        return getattr(self._client, name)
+
+    @property
+    def in_flight(self) -> int:
+        """the number of commands awaiting a reply"""
+        return len(self._pending)
+
+    def run(self, command: str, *arguments: str) -> str:
+        """queue a command for sending, returns an empty response"""
+        text = " ".join(str_until_none(command, *arguments))
+
+        while len(self._pending) >= self.window:
+            self._receive()
+
+        request_id = next(self._ids) % LittleEndianSignedInt32.MAX
+        packet = Packet(
+            LittleEndianSignedInt32(request_id),
+            Type.SERVERDATA_EXECCOMMAND,
+            text.encode(self.encoding),
+        )
+        self._socket.sendall(bytes(packet))
+        self._pending[request_id] = text
+        self.sent += 1
+
+        return ""
+
+    def flush(self) -> None:
+        """wait for all replies, then raise the first error reported"""
+        while self._pending:
+            self._receive()
+
+        if self.errors:
+            _, error = self.errors[0]
+            self.errors = []
+            raise error
+
+    def _drain(self) -> None:
+        """
+        read the outstanding replies so that the client can be used again,
+        keeping any errors in errors rather than raising them
+        """
+        try:
+            while self._pending:
+                self._receive()
+        except Exception:  # pylint: disable=W0703
+            # the connection is broken, the replies will never arrive
+            self._pending.clear()
+
+    def _receive(self) -> Optional[str]:
+        """read one reply and match it to its command"""
+        response = Packet.read(self._reader)
+        command = self._pending.pop(response.id, None)
+
+        if command is None:
+            raise SessionTimeout("packet ID mismatch")
+
+        try:
+            return check_result(response.payload.decode(self.encoding))
+        except Exception as error:  # pylint: disable=W0703
+            self.errors.append((command, error))
+
+        return None
@@ -3,11 +3,13 @@ functions for creating polygons in profiles (2d lists of Items)
 """
 import math
 import operator
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 from mcipc.rcon.enumerations import Item
 
+from mcwb.palette import Palette, air_value
+
 
 def poly_points(diameter: int, sides: int, offset: Optional[float] = None):
     """
@@ -40,33 +42,41 @@ def poly_profile(
     item: Item = Item.STONE,
     offset=None,
     fill_item: Item = Item.AIR,
+    palette: Optional[Palette] = None,
 ) -> np.ndarray:
     """
     Create a profile containing a polygon. The dimensions of the profile
     will be just large enough to contain the specified polygon.
+
+    If a palette is supplied the profile contains indices into the palette
+    instead of Items.
     """
 
     x_points, z_points = poly_points(diameter=diameter, sides=sides, offset=offset)
     x_size = max(x_points) - min(x_points) + 1
     z_size = max(z_points) - min(z_points) + 1
     vertices = [(x, z) for x, z in zip(x_points, z_points)]
-
-    profile = np.full(shape=(x_size, z_size), fill_value=Item.AIR, dtype=Item)
     center = math.floor(x_size / 2), math.floor(z_size / 2)
 
-    return poly_draw(profile, vertices, center, item, fill_item=fill_item)
+    if palette is None:
+        profile = np.full(shape=(x_size, z_size), fill_value=Item.AIR, dtype=Item)
+        return poly_draw(profile, vertices, center, item, fill_item=fill_item)
+
+    fill_index, item_index = palette.index(fill_item), palette.index(item)
+    profile = np.zeros(shape=(x_size, z_size), dtype=palette.dtype)
+    return poly_draw(profile, vertices, center, item_index, fill_item=fill_index)
 
 
 def poly_draw(
     profile: np.ndarray,
     vertices: List[Tuple[int, int]],
     center: Tuple[int, int],
-    item: Item,
-    fill_item: Item = Item.AIR,
+    item: Union[Item, int],
+    fill_item: Union[Item, int] = Item.AIR,
 ) -> np.ndarray:
     """
     Take a list of 2d points and draw lines between them to make a polygon
-    inside of a profile (2d array of Item).
+    inside of a profile (2d array of Item or of palette indices).
     """
 
     def add_2d(x, z):
@@ -82,10 +92,11 @@ def poly_draw(
             item,
         )
 
-    if fill_item != Item.AIR:
+    air = air_value(profile)
+    if fill_item not in (air, Item.AIR):
         for r in range(profile.shape[0]):
             row = profile[r]
-            result = np.where(row != Item.AIR)
+            result = np.where(row != air)
             positions = result[0]
             if len(positions) == 2:
                 row[positions[0] + 1 : positions[1]] = fill_item
@@ -97,7 +108,7 @@ def draw_line_xz(
     profile: np.ndarray,
     start: Tuple[int, int],  # x, z
     end: Tuple[int, int],  # x, z
-    item: Item = Item.AIR,
+    item: Union[Item, int] = Item.AIR,
     overlap: int = 0,
 ):
     """
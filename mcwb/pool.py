@@ -0,0 +1,165 @@
+"""
+Drive several RCON connections to the same server in parallel
+"""
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import partial
+from operator import methodcaller
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from mcipc.rcon.enumerations import FillMode
+from mcipc.rcon.je import Client
+
+from mcwb.itemlists import read_boxes
+from mcwb.palette import Palette
+from mcwb.types import Grab, Vec3
+from mcwb.volume import Volume
+
+__all__ = ["ClientPool"]
+
+
+class ClientPool:
+    """
+    A pool of logged in Clients, each driven by its own worker thread.
+
+    Work is partitioned into chunk columns and every chunk column is always
+    handled by the same connection. Each connection executes its commands in
+    order, so fills that overlap are applied in the order they were issued.
+
+    A ClientPool can be passed in place of a Client to the build functions
+    (make_tunnel, polygon, Volume.fill, Blocks ...) and to grab. Commands are
+    sent in the background, call wait() or use the pool as a context manager
+    to wait for them. Accessing any other client attribute waits for all
+    outstanding commands and then delegates to the first client.
+    """
+
+    def __init__(self, clients: Sequence[Client]) -> None:
+        if not clients:
+            raise ValueError("a ClientPool needs at least one client")
+
+        self.clients = list(clients)
+        self._workers = [ThreadPoolExecutor(max_workers=1) for _ in self.clients]
+        # outstanding and failed submissions in order, as an ordered set
+        self._futures: Dict[Future, None] = {}
+        self._lock = Lock()
+
+        # per connection statistics
+        self.commands = [0] * len(self.clients)
+        self.busy = [0.0] * len(self.clients)
+
+    def __enter__(self) -> "ClientPool":
+        return self
+
+    def __exit__(self, typ, value, traceback) -> None:
+        if typ is None:
+            self.wait()
+
+    def __getattr__(self, name: str) -> Any:
+        self.wait()
+        return getattr(self.clients[0], name)
+
+    @property
+    def throughput(self) -> List[float]:
+        """commands per second of busy time for each connection"""
+        return [
+            commands / busy if busy else 0.0
+            for commands, busy in zip(self.commands, self.busy)
+        ]
+
+    def close(self) -> None:
+        """wait for outstanding commands and stop the worker threads"""
+        self.wait()
+        for worker in self._workers:
+            worker.shutdown()
+
+    def wait(self) -> None:
+        """wait for all outstanding commands, raising the first error"""
+        with self._lock:
+            futures, self._futures = self._futures, {}
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def fill(
+        self,
+        from_: Vec3,
+        to: Vec3,
+        block: str,
+        mode: Optional[FillMode] = None,
+        filter: Optional[str] = None,
+    ) -> str:
+        """fill a region, split into one command per chunk column"""
+        if mode in (FillMode.HOLLOW, FillMode.OUTLINE):
+            # the result depends on the whole region so it can't be split
+            self.wait()
+            return self.clients[0].fill(from_, to, block, mode, filter)
+
+        for column in Volume.from_corners(from_, to).chunks():
+            command = methodcaller(
+                "fill", column.start, column.end, block, mode, filter
+            )
+            self._submit(column, command)
+        return ""
+
+    def setblock(self, pos: Vec3, block: str, mode: Optional[str] = None) -> str:
+        """set a block"""
+        command = methodcaller("setblock", pos, block, mode)
+        self._submit(Volume.from_corners(pos, pos), command)
+        return ""
+
+    def grab_indices(
+        self, vol: Volume, palette: Palette, strategy: Grab = Grab.CELLS
+    ) -> np.ndarray:
+        """
+        copy blocks from a Volume into an array of indices into palette,
+        reading each chunk column over its own connection
+        """
+        self.wait()
+        cube = np.zeros(vol.size.i_tuple, dtype=np.uint16)
+        lock = Lock()  # the workers share the palette
+
+        def read(client: Client, column: Volume) -> None:
+            for block, start, end in read_boxes(client, column, strategy):
+                lower, upper = start - vol.start, end - vol.start + 1
+                with lock:
+                    index = palette.index(block)
+                cube[lower.x : upper.x, lower.y : upper.y, lower.z : upper.z] = index
+
+        for column in vol.chunks():
+            self._submit(column, partial(read, column=column), column.size.volume)
+        self.wait()
+
+        return cube.astype(palette.dtype)
+
+    def _connection(self, column: Volume) -> int:
+        """the index of the connection that owns a chunk column"""
+        x, z = column.chunk
+        return hash((x, z)) % len(self.clients)
+
+    def _submit(
+        self, column: Volume, function: Callable[[Client], Any], commands: int = 1
+    ) -> None:
+        """queue a call of function with the client that owns column"""
+        index = self._connection(column)
+        client = self.clients[index]
+
+        def call() -> Any:
+            started = perf_counter()
+            try:
+                return function(client)
+            finally:
+                self.commands[index] += commands
+                self.busy[index] += perf_counter() - started
+
+        future = self._workers[index].submit(call)
+        with self._lock:
+            self._futures[future] = None
+        future.add_done_callback(self._finished)
+
+    def _finished(self, future: Future) -> None:
+        """forget a completed submission, keeping failures for wait()"""
+        if not future.cancelled() and future.exception() is None:
+            with self._lock:
+                self._futures.pop(future, None)
@@ -0,0 +1,103 @@
+"""
+Import Sponge (.schem) and Litematica (.litematic) schematic files as arrays
+of palette indices
+
+The block arrays are decoded with numpy, without a python loop per block.
+Block states (e.g. the [axis=y] of minecraft:oak_log[axis=y]) are not
+represented by Item and are dropped.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import nbt
+from mcwb.functions import unpack_bits
+from mcwb.palette import Palette
+
+__all__ = ["load_litematic", "load_schem"]
+
+
+def load_schem(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """load a Sponge schematic (version 1 to 3) as a cube of indices"""
+    root = nbt.load(filename)
+    root = root.get("Schematic", root)  # version 3 nests everything
+
+    if "Blocks" in root:  # version 3
+        entries, data = root["Blocks"]["Palette"], root["Blocks"]["Data"]
+    else:
+        entries, data = root["Palette"], root["BlockData"]
+
+    lookup = _lookup(entries.items(), palette)
+    size = (int(root["Height"]), int(root["Length"]), int(root["Width"]))
+    values = _varints(data, size[0] * size[1] * size[2])
+
+    # blocks are stored in y, z, x order
+    cube = lookup[values].reshape(size).transpose(2, 0, 1)
+    return np.ascontiguousarray(cube, dtype=palette.dtype)
+
+
+def load_litematic(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """
+    load a Litematica schematic as a cube of indices, all of its regions are
+    combined into one cube
+    """
+    root = nbt.load(filename)
+    regions = root["Regions"].values()
+
+    # a negative size extends the region back from its position
+    def corners(region: Dict[str, Any]) -> np.ndarray:
+        position = np.array([region["Position"][axis] for axis in "xyz"])
+        size = np.array([region["Size"][axis] for axis in "xyz"])
+        start = np.where(size < 0, position + size + 1, position)
+        return np.array([start, start + abs(size)])
+
+    bounds = np.array([corners(region) for region in regions])
+    origin = bounds[:, 0].min(axis=0)
+    cube = np.zeros(tuple(bounds[:, 1].max(axis=0) - origin), dtype=np.uint32)
+
+    for region, (start, end) in zip(regions, bounds):
+        states = region["BlockStatePalette"]
+        names = ((entry["Name"], i) for i, entry in enumerate(states))
+        lookup = _lookup(names, palette)
+        sx, sy, sz = end - start
+        bits = max(2, (len(states) - 1).bit_length())
+        values = unpack_bits(region["BlockStates"], bits, sx * sy * sz, True)
+
+        # blocks are stored in y, z, x order, air leaves earlier regions alone
+        blocks = lookup[values].reshape(sy, sz, sx).transpose(2, 0, 1)
+        lower, upper = start - origin, end - origin
+        target = cube[lower[0] : upper[0], lower[1] : upper[1], lower[2] : upper[2]]
+        np.copyto(target, blocks, where=blocks != 0)
+
+    return cube.astype(palette.dtype)
+
+
+def _lookup(entries: Iterable, palette: Palette) -> np.ndarray:
+    """map (block state, index) pairs of a schematic palette to palette"""
+    entries = list(entries)
+    lookup = np.zeros(max((int(i) for _, i in entries), default=-1) + 1, np.uint32)
+    for state, i in entries:
+        lookup[int(i)] = palette.index(Item(state.split("[")[0]))
+
+    return lookup
+
+
+def _varints(data: np.ndarray, count: int) -> np.ndarray:
+    """decode count unsigned LEB128 varints from an array of bytes"""
+    data = np.asarray(data).view(np.uint8)
+    ends = np.flatnonzero(data < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError("not enough block data in the schematic")
+
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+
+    values = np.zeros(count, dtype=np.uint32)
+    for byte in range(int(lengths.max(initial=0))):
+        more = lengths > byte
+        chunk = data[starts[more] + byte].astype(np.uint32) & 0x7F
+        values[more] |= chunk << (7 * byte)
+
+    return values
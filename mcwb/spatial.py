@@ -0,0 +1,181 @@
+"""
+Find Volumes by position without testing every one of them
+"""
+from collections import defaultdict
+from itertools import product
+from math import sqrt
+from typing import DefaultDict, Dict, Iterator, List, Optional, Set, Tuple
+
+from mcwb.types import Vec3
+from mcwb.volume import CHUNK_SIZE, Volume
+
+__all__ = ["VolumeIndex"]
+
+Cell = Tuple[int, int]
+
+
+class VolumeIndex:
+    """
+    A spatial index of Volumes on a grid of x, z cells (chunk columns by
+    default). Each Volume is listed in every cell it overlaps, so a query
+    only tests the Volumes in the cells that it touches.
+
+    The index holds the Volumes themselves: move them with move and move_to
+    (or call update after changing one by other means) so that the index
+    stays in step.
+    """
+
+    def __init__(self, cell_size: int = CHUNK_SIZE) -> None:
+        self.cell_size = cell_size
+        self._grid: DefaultDict[Cell, Set[Volume]] = defaultdict(set)
+        self._cells: Dict[Volume, List[Cell]] = {}
+        # the lowest and highest occupied cells, bounding the nearest search,
+        # None when they must be found again after a removal
+        self._bounds: Optional[Tuple[Cell, Cell]] = None
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __iter__(self) -> Iterator[Volume]:
+        return iter(self._cells)
+
+    def __contains__(self, volume: Volume) -> bool:
+        return volume in self._cells
+
+    def add(self, volume: Volume) -> None:
+        """add a Volume to the index"""
+        if volume in self._cells:
+            self._unlink(volume)
+        cells = self._cells[volume] = self._covering(volume.start, volume.end)
+        for cell in cells:
+            self._grid[cell].add(volume)
+
+        if self._bounds is not None or len(self._cells) == 1:
+            self._bounds = _extend(self._bounds, cells[0], cells[-1])
+
+    def remove(self, volume: Volume) -> None:
+        """remove a Volume from the index"""
+        self._unlink(volume)
+        del self._cells[volume]
+
+    def update(self, volume: Volume) -> None:
+        """re-index a Volume after it has moved"""
+        cells = self._covering(volume.start, volume.end)
+        if cells != self._cells[volume]:
+            self.add(volume)
+
+    def move(self, volume: Volume, distance: Vec3) -> None:
+        """move an indexed Volume by distance, see Volume.move"""
+        volume.move(distance)
+        self.update(volume)
+
+    def move_to(self, volume: Volume, position: Vec3) -> None:
+        """move an indexed Volume to position, see Volume.move_to"""
+        volume.move_to(position)
+        self.update(volume)
+
+    def at(self, position: Vec3) -> List[Volume]:
+        """the Volumes that contain position"""
+        cell = self._cell(position)
+        return [vol for vol in self._grid.get(cell, ()) if vol.inside(position)]
+
+    def overlapping(self, volume: Volume) -> List[Volume]:
+        """the Volumes that share any blocks with volume"""
+        found: Set[Volume] = set()
+        for cell in self._covering(volume.start, volume.end):
+            found.update(self._grid.get(cell, ()))
+
+        return [vol for vol in found if vol.intersects(volume)]
+
+    def nearest(self, position: Vec3) -> Optional[Volume]:
+        """the Volume closest to position (in blocks), None if empty"""
+        if not self._cells:
+            return None
+        if self._bounds is None:
+            for cell in self._grid:
+                self._bounds = _extend(self._bounds, cell, cell)
+        assert self._bounds is not None
+
+        # rings closer than the occupied cells are empty, skip them
+        cx, cz = self._cell(position)
+        (low_x, low_z), (high_x, high_z) = self._bounds
+        reach = max(cx - low_x, high_x - cx, cz - low_z, high_z - cz)
+        first = max(low_x - cx, cx - high_x, low_z - cz, cz - high_z, 0)
+
+        best, best_distance = None, float("inf")
+        scanned = 0
+        for ring in range(first, reach + 1):
+            # the cells of this ring are at least this far away horizontally
+            if (ring - 1) * self.cell_size > best_distance:
+                break
+            # once the rings hold more cells than are occupied, test every
+            # Volume instead
+            scanned += 8 * ring or 1
+            if scanned > len(self._grid):
+                return min(self._cells, key=lambda vol: _distance(vol, position))
+            for cell in _ring(cx, cz, ring):
+                for vol in self._grid.get(cell, ()):
+                    distance = _distance(vol, position)
+                    if distance < best_distance:
+                        best, best_distance = vol, distance
+
+        return best
+
+    def _cell(self, position: Vec3) -> Cell:
+        return int(position.x) // self.cell_size, int(position.z) // self.cell_size
+
+    def _covering(self, start: Vec3, end: Vec3) -> List[Cell]:
+        """the cells that the box from start to end overlaps"""
+        (x0, z0), (x1, z1) = self._cell(start), self._cell(end)
+        return list(product(range(x0, x1 + 1), range(z0, z1 + 1)))
+
+    def _unlink(self, volume: Volume) -> None:
+        for cell in self._cells[volume]:
+            volumes = self._grid[cell]
+            volumes.discard(volume)
+            if not volumes:
+                del self._grid[cell]
+                if self._bounds is not None and _on_edge(cell, self._bounds):
+                    self._bounds = None
+
+
+def _extend(
+    bounds: Optional[Tuple[Cell, Cell]], low: Cell, high: Cell
+) -> Tuple[Cell, Cell]:
+    """the bounds grown to include the cells from low to high"""
+    if bounds is None:
+        return low, high
+    (low_x, low_z), (high_x, high_z) = bounds
+    return (
+        (min(low[0], low_x), min(low[1], low_z)),
+        (max(high[0], high_x), max(high[1], high_z)),
+    )
+
+
+def _on_edge(cell: Cell, bounds: Tuple[Cell, Cell]) -> bool:
+    """whether cell lies on the edge of bounds"""
+    (low_x, low_z), (high_x, high_z) = bounds
+    return cell[0] in (low_x, high_x) or cell[1] in (low_z, high_z)
+
+
+def _ring(cx: int, cz: int, ring: int) -> Iterator[Cell]:
+    """the cells at exactly ring cells (in x or z) from cx, cz"""
+    if ring == 0:
+        yield cx, cz
+        return
+
+    for x in range(cx - ring, cx + ring + 1):
+        yield x, cz - ring
+        yield x, cz + ring
+    for z in range(cz - ring + 1, cz + ring):
+        yield cx - ring, z
+        yield cx + ring, z
+
+
+def _distance(volume: Volume, position: Vec3) -> float:
+    """the distance from position to the nearest block of volume"""
+    dx, dy, dz = (
+        max(low - p, 0, p - high)
+        for low, p, high in zip(volume.start, position, volume.end)
+    )
+    return sqrt(dx * dx + dy * dy + dz * dz)
@@ -0,0 +1,68 @@
+"""
+Save and load arrays of palette indices as vanilla structure (.nbt) files
+
+Structure files can be placed by the server in a single command, with a
+structure block or /place template, and are produced by many other tools.
+Block states (the Properties of a palette entry) are not represented by Item
+and are dropped on load.
+"""
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import nbt
+from mcwb.palette import Palette
+
+__all__ = ["DATA_VERSION", "load_structure", "save_structure"]
+
+# the data version of Minecraft 1.19.2
+DATA_VERSION = 3120
+
+
+def save_structure(
+    indices: np.ndarray,
+    palette: Palette,
+    filename: Union[Path, str],
+    data_version: int = DATA_VERSION,
+) -> None:
+    """
+    save a cube of indices into palette as a structure file, air cells are
+    left out so that placing the structure keeps the existing blocks there
+    (like the structure void block)
+    """
+    positions = np.argwhere(indices != 0)
+    used, states = np.unique(indices[indices != 0], return_inverse=True)
+
+    root = {
+        "DataVersion": nbt.Int(data_version),
+        "size": [nbt.Int(n) for n in indices.shape],
+        "palette": [{"Name": palette[index].value} for index in used],
+        "blocks": [
+            {"pos": [nbt.Int(n) for n in pos], "state": nbt.Int(state)}
+            for pos, state in zip(positions.tolist(), states.tolist())
+        ],
+        "entities": [],
+    }
+    nbt.save(root, filename)
+
+
+def load_structure(filename: Union[Path, str], palette: Palette) -> np.ndarray:
+    """
+    load a structure file as a cube of indices into palette, cells without a
+    block are air
+    """
+    root = nbt.load(filename)
+
+    # structures with random variants have several palettes, use the first
+    entries = root["palette"] if "palette" in root else root["palettes"][0]
+    lookup = np.array([palette.index(Item(entry["Name"])) for entry in entries])
+
+    cube = np.zeros(tuple(root["size"]), dtype=palette.dtype)
+    if root["blocks"]:
+        positions = np.array([block["pos"] for block in root["blocks"]])
+        states = np.array([block["state"] for block in root["blocks"]])
+        cube[tuple(positions.T)] = lookup[states]
+
+    return cube
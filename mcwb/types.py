@@ -19,6 +19,7 @@ __all__ = [
     "Offset",
     "Offsets",
     "Profile",
+    "Render",
     "Row",
     "Vec3",
 ]
@@ -291,6 +292,20 @@ class Planes3d(Enum):
     YZ = (1, 2)
 
 
+class Render(Enum):
+    """Strategies for rendering a cuboid of blocks into the world."""
+
+    SETBLOCK = "setblock"  # one setblock command per solid block
+    FILL = "fill"  # one fill command per box of identical blocks
+
+
+class Grab(Enum):
+    """Strategies for reading a cuboid of blocks from the world."""
+
+    CELLS = "cells"  # one get_block per block
+    OCTREE = "octree"  # test sub-volumes for uniformity, only split mixed ones
+
+
 Row = Union[List[Item], np.ndarray]
 Profile = Union[List[Row], np.ndarray]
 Cuboid = Union[List[Profile], np.ndarray]
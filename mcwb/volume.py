@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
+from itertools import product
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
 from mcipc.rcon.enumerations import Item
 from mcipc.rcon.je import Client
 
-from mcwb import Anchor, Anchor3, Anchor3Face, Direction, Vec3, make_tunnel
-
-__all__ = ["Volume"]
+from mcwb import Anchor3, Anchor3Face, Vec3
+from mcwb.functions import CHUNK_SIZE, MAX_MINECRAFT_FILL_COMMAND, boxes, split_box
 
-MAX_MINECRAFT_FILL_COMMAND = 32768
+__all__ = ["CHUNK_SIZE", "Volume", "VolumeArray", "VolumeSet"]
 
 
 class Volume:
@@ -81,6 +84,63 @@ class Volume:
             and self.start.z - ztol <= position.z <= self.end.z + ztol
         )
 
+    def intersects(self, other: Volume) -> bool:
+        """determine if other shares any blocks with the Volume"""
+        return (
+            self.start.x <= other.end.x
+            and other.start.x <= self.end.x
+            and self.start.y <= other.end.y
+            and other.start.y <= self.end.y
+            and self.start.z <= other.end.z
+            and other.start.z <= self.end.z
+        )
+
+    def __or__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return VolumeSet([self]) | other
+
+    def __and__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return VolumeSet([self]) & other
+
+    def __sub__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return VolumeSet([self]) - other
+
+    def slices(self, origin: Vec3 = Vec3(0, 0, 0)) -> Tuple[slice, slice, slice]:
+        """
+        the slices that select the Volume from an array whose first cell is
+        at origin
+        """
+        start, end = self.start - origin, self.end - origin + 1
+        return (
+            slice(int(start.x), int(end.x)),
+            slice(int(start.y), int(end.y)),
+            slice(int(start.z), int(end.z)),
+        )
+
+    def chunks(self) -> Iterator[Volume]:
+        """
+        split the Volume into disjoint sub-volumes that are each contained in
+        a single chunk column, in x then z order
+        """
+        start, end = self.start.with_ints(), self.end.with_ints()
+        xs = range(start.x - start.x % CHUNK_SIZE, end.x + 1, CHUNK_SIZE)
+        zs = range(start.z - start.z % CHUNK_SIZE, end.z + 1, CHUNK_SIZE)
+
+        for x, z in product(xs, zs):
+            yield Volume.from_corners(
+                Vec3(max(x, start.x), start.y, max(z, start.z)),
+                Vec3(
+                    min(x + CHUNK_SIZE - 1, end.x),
+                    end.y,
+                    min(z + CHUNK_SIZE - 1, end.z),
+                ),
+            )
+
+    @property
+    def chunk(self) -> Tuple[int, int]:
+        """the x, z coordinates of the chunk containing start"""
+        start = self.start.with_ints()
+        return start.x // CHUNK_SIZE, start.z // CHUNK_SIZE
+
     def move(self, distance: Vec3) -> None:
         """move the volume's location in space by distance"""
         self.start += distance
@@ -95,18 +155,15 @@ class Volume:
 
     def fill(self, client: Client, block: Item = Item.AIR):
         """Fill the Volume with a single block type, supports large volumes"""
-        if self.size.volume < MAX_MINECRAFT_FILL_COMMAND:
-            client.fill(self.start, self.end, block.value)
-        else:
-            profile = [[block] * int(self.size.x)] * int(self.size.y)
-            make_tunnel(
-                client,
-                profile, # type: ignore
-                self.start,
-                direction=Direction.UP,
-                anchor=Anchor.BOTTOM_LEFT,
-                length=int(self.size.dz),
-            )
+        for start, end in self.fill_boxes():
+            client.fill(start, end, block.value)
+
+    def fill_boxes(self) -> Iterator[Tuple[Vec3, Vec3]]:
+        """
+        the corners of the fill commands needed to fill the Volume, as few
+        as the fill command's size limit allows (see split_box)
+        """
+        return split_box(self.start, self.end, MAX_MINECRAFT_FILL_COMMAND)
 
     def walls(
         self,
@@ -122,17 +179,267 @@ class Volume:
         west: bool = True,
     ) -> None:
         """renders walls at the faces of the volume"""
+        faces = self.wall_boxes(
+            thickness=thickness,
+            top=top,
+            bottom=bottom,
+            north=north,
+            south=south,
+            east=east,
+            west=west,
+        )
+        for start, end in faces:
+            client.fill(start, end, block.value)
+
+    def wall_boxes(
+        self,
+        *,
+        thickness: int = 1,
+        top: bool = True,
+        bottom: bool = True,
+        north: bool = True,
+        south: bool = True,
+        east: bool = True,
+        west: bool = True,
+    ) -> Iterator[Tuple[Vec3, Vec3]]:
+        """
+        the corners of the fill commands needed to render walls, each wall
+        is split if it is larger than the fill command's size limit
+        """
         t = thickness - 1
-        b = block.value
+        faces = []
         if north:
-            client.fill(self.start, Vec3(self.end.x, self.end.y, self.start.z + t), b)
+            faces.append((self.start, Vec3(self.end.x, self.end.y, self.start.z + t)))
         if south:
-            client.fill(self.end, Vec3(self.start.x, self.start.y, self.end.z - t), b)
+            faces.append((self.end, Vec3(self.start.x, self.start.y, self.end.z - t)))
         if west:
-            client.fill(self.start, Vec3(self.start.x + t, self.end.y, self.end.z), b)
+            faces.append((self.start, Vec3(self.start.x + t, self.end.y, self.end.z)))
         if east:
-            client.fill(self.end, Vec3(self.end.x - t, self.start.y, self.start.z), b)
+            faces.append((self.end, Vec3(self.end.x - t, self.start.y, self.start.z)))
         if top:
-            client.fill(self.end, Vec3(self.start.x, self.end.y - t, self.start.z), b)
+            faces.append((self.end, Vec3(self.start.x, self.end.y - t, self.start.z)))
         if bottom:
-            client.fill(self.start, Vec3(self.end.x, self.start.y + 1, self.end.z), b)
+            faces.append((self.start, Vec3(self.end.x, self.start.y + t, self.end.z)))
+
+        for start, end in faces:
+            yield from split_box(start, end, MAX_MINECRAFT_FILL_COMMAND)
+
+
+class VolumeSet:
+    """
+    A set of blocks held as disjoint Volumes, combined with | (union),
+    & (intersection) and - (difference); Volumes combine into VolumeSets
+    with the same operators. e.g. the air inside a room, leaving the
+    furniture alone:
+        (room - furniture).fill(client, Item.AIR)
+
+    The result of each operation is normalized into a small number of
+    disjoint boxes so that no block is filled twice.
+    """
+
+    def __init__(self, volumes: Iterable[Volume] = ()) -> None:
+        self.volumes: List[Volume] = _combine(list(volumes), [], np.logical_or)
+
+    def __iter__(self) -> Iterator[Volume]:
+        return iter(self.volumes)
+
+    def __len__(self) -> int:
+        return len(self.volumes)
+
+    def __bool__(self) -> bool:
+        return bool(self.volumes)
+
+    def __or__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return _result(_combine(self.volumes, _volumes(other), np.logical_or))
+
+    def __and__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return _result(_combine(self.volumes, _volumes(other), np.logical_and))
+
+    def __sub__(self, other: Union[Volume, VolumeSet]) -> VolumeSet:
+        return _result(_combine(self.volumes, _volumes(other), _difference))
+
+    @property
+    def size(self) -> int:
+        """the number of blocks in the set"""
+        return sum(int(volume.size.volume) for volume in self.volumes)
+
+    def inside(self, position: Vec3) -> bool:
+        """determine if position is within the set"""
+        return any(volume.inside(position) for volume in self.volumes)
+
+    def fill(self, client: Client, block: Item = Item.AIR):
+        """Fill the set with a single block type, see Volume.fill"""
+        for start, end in self.fill_boxes():
+            client.fill(start, end, block.value)
+
+    def fill_boxes(self) -> Iterator[Tuple[Vec3, Vec3]]:
+        """the corners of the fill commands needed to fill the set"""
+        for volume in self.volumes:
+            yield from volume.fill_boxes()
+
+
+class VolumeArray:
+    """
+    Many Volumes held as (n, 3) integer arrays of start and end corners, so
+    that geometry queries over all of them are single numpy expressions.
+    Queries return boolean arrays with one row per Volume.
+    """
+
+    def __init__(self, starts: Any, ends: Any) -> None:
+        """starts and ends are opposite corners, in any order"""
+        starts = np.floor(np.asarray(starts).reshape(-1, 3)).astype(np.int64)
+        ends = np.floor(np.asarray(ends).reshape(-1, 3)).astype(np.int64)
+        self.starts: np.ndarray = np.minimum(starts, ends)
+        self.ends: np.ndarray = np.maximum(starts, ends)
+
+    @classmethod
+    def from_volumes(cls, volumes: Iterable[Volume]) -> VolumeArray:
+        """a factory function to gather Volumes into a VolumeArray"""
+        volumes = list(volumes)
+        return cls(
+            np.array([vol.start for vol in volumes], dtype=np.int64).reshape(-1, 3),
+            np.array([vol.end for vol in volumes], dtype=np.int64).reshape(-1, 3),
+        )
+
+    @classmethod
+    def from_corners(cls, starts: Any, ends: Any) -> VolumeArray:
+        """a factory function to define Volumes using opposite corners"""
+        return cls(starts, ends)
+
+    @classmethod
+    def from_anchor(cls, positions: Any, sizes: Any, anchor: Anchor3) -> VolumeArray:
+        """
+        a factory function to create Volumes using anchor and size, placed
+        as Volume.from_anchor places them. sizes is one size for all or one
+        per position.
+        """
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+        sizes = np.broadcast_to(np.asarray(sizes, dtype=np.int64), positions.shape)
+
+        offsets = np.zeros_like(positions)
+        if anchor in Anchor3Face.TOP:
+            offsets[:, 1] += 1 - sizes[:, 1]
+        if anchor in Anchor3Face.SOUTH:
+            offsets[:, 2] += 1 - sizes[:, 2]
+        if anchor in Anchor3Face.EAST:
+            offsets[:, 0] += 1 - sizes[:, 0]
+        if anchor in Anchor3Face.MIDDLE_FACE:  # middle of top or bottom
+            offsets[:, [0, 2]] -= sizes[:, [0, 2]] // 2
+        elif anchor is Anchor3.MIDDLE:
+            offsets = -(sizes // 2)
+
+        starts = positions + offsets
+        return cls(starts, starts + sizes - 1)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, index: int) -> Volume:
+        return Volume.from_corners(Vec3(*self.starts[index]), Vec3(*self.ends[index]))
+
+    def __iter__(self) -> Iterator[Volume]:
+        return (self[i] for i in range(len(self)))
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """the dimensions of the Volumes"""
+        return self.ends - self.starts + 1
+
+    def inside(self, points: Any) -> np.ndarray:
+        """
+        determine which of points (an (m, 3) array) are within which
+        Volumes, an (n, m) array
+        """
+        points = np.asarray(points).reshape(-1, 3)
+        return _intersect(self.starts, self.ends, points, points)
+
+    def overlaps(self, other: Optional[VolumeArray] = None) -> np.ndarray:
+        """
+        determine which Volumes share any blocks with which Volumes of other
+        (or of this array), an (n, len(other)) array
+        """
+        other = self if other is None else other
+        return _intersect(self.starts, self.ends, other.starts, other.ends)
+
+    def move(self, distance: Any) -> None:
+        """move the Volumes by distance, one for all or one per Volume"""
+        distance = np.asarray(distance, dtype=np.int64)
+        self.starts += distance
+        self.ends += distance
+
+
+def _intersect(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    other_starts: np.ndarray,
+    other_ends: np.ndarray,
+) -> np.ndarray:
+    """
+    an (n, m) array that is True where box i of starts, ends shares any
+    blocks with box j of other_starts, other_ends (points are boxes with
+    equal corners). Each axis is compared in turn, which avoids the
+    (n, m, 3) temporaries of comparing all axes at once.
+    """
+    result = np.ones((len(starts), len(other_starts)), dtype=bool)
+    for axis in range(3):
+        result &= starts[:, axis, None] <= other_ends[None, :, axis]
+        result &= other_starts[None, :, axis] <= ends[:, axis, None]
+
+    return result
+
+
+def _volumes(other: Union[Volume, VolumeSet]) -> List[Volume]:
+    return [other] if isinstance(other, Volume) else other.volumes
+
+
+def _difference(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    return first & ~second
+
+
+def _result(volumes: List[Volume]) -> VolumeSet:
+    result = VolumeSet()
+    result.volumes = volumes
+    return result
+
+
+def _combine(
+    first: List[Volume],
+    second: List[Volume],
+    operation: Callable[[np.ndarray, np.ndarray], np.ndarray],
+) -> List[Volume]:
+    """
+    combine two lists of Volumes with a boolean operation on their blocks,
+    returning disjoint Volumes. The space is divided at every face of every
+    Volume, so the operation is done on a grid of at most (2n)^3 cells
+    whatever the size of the Volumes, and the cells are then merged back
+    into boxes.
+    """
+    volumes = first + second
+    if not volumes:
+        return []
+
+    starts = np.array([volume.start for volume in volumes], dtype=np.int64)
+    ends = np.array([volume.end for volume in volumes], dtype=np.int64) + 1
+    # the edges of the cells along each axis
+    edges = [np.unique(np.concatenate((starts[:, i], ends[:, i]))) for i in range(3)]
+    lower = np.array([np.searchsorted(edges[i], starts[:, i]) for i in range(3)]).T
+    upper = np.array([np.searchsorted(edges[i], ends[:, i]) for i in range(3)]).T
+
+    shape = tuple(len(edge) - 1 for edge in edges)
+    masks = [np.zeros(shape, dtype=bool), np.zeros(shape, dtype=bool)]
+    for n, (low, high) in enumerate(zip(lower, upper)):
+        mask = masks[0 if n < len(first) else 1]
+        mask[low[0] : high[0], low[1] : high[1], low[2] : high[2]] = True
+
+    cells = operation(*masks)
+    result = []
+    for _, start, end in boxes(cells, cells, cells.size):
+        low, high = start.i_tuple, (end + 1).i_tuple
+        result.append(
+            Volume.from_corners(
+                Vec3(*(int(edges[i][low[i]]) for i in range(3))),
+                Vec3(*(int(edges[i][high[i]]) - 1 for i in range(3))),
+            )
+        )
+
+    return result
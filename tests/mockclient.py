@@ -1,28 +1,90 @@
 """
 A mock client for testing functions that call the minecraft server.
 This mocks a world of 100 blocks square with origin in the middle.
+The world is stored as indices into a Palette of Items.
 """
+from itertools import product
 from math import floor
+from typing import Optional, Set, Tuple
 
 import numpy as np
+from mcipc.rcon.commands.execute import execute
 from mcipc.rcon.enumerations import FillMode, Item
+from mcipc.rcon.functions import str_until_none
 
 from mcwb import Items, Vec3
+from mcwb.palette import Palette
+
+# blocks that loot spawn reports as an empty loot table, like the server
+NO_DROPS = {Item.BARRIER}
 
 
 class MockClient:
     def __init__(self, size=100):
         """create an empty mock world"""
-        self.world = np.full((size, size, size), Item.AIR, dtype=Item)
+        self.palette = Palette()
+        self.world = np.zeros((size, size, size), dtype=np.uint16)
         off = size // 2
         self.offset = Vec3(off, off, off)
+        self.commands = 0  # count of world modifying commands received
+        self.reads = 0  # count of commands that read the world
+        self.forceloaded: Set[Tuple[int, int]] = set()  # chunks kept loaded
 
     # the following are mock versions of the original Client Functions
 
-    def setblock(self, position: Vec3, block: Item):
+    execute = property(execute)
+
+    def run(self, command: str, *arguments: str) -> str:
+        """
+        mock the commands that are sent as text, currently only
+        execute if block, execute if blocks with scan mode all and
+        forceload add, remove and query
+        """
+        words = " ".join(str_until_none(command, *arguments)).split()
+        if words == ["forceload", "query"]:
+            if not self.forceloaded:
+                return "No force loaded chunks were found in minecraft:overworld"
+            listed = ", ".join(f"[{x}, {z}]" for x, z in sorted(self.forceloaded))
+            return (
+                f"There are {len(self.forceloaded)} force loaded chunks in "
+                f"minecraft:overworld at: {listed}"
+            )
+        if words[0] == "forceload" and words[1] in ("add", "remove"):
+            x0, z0, x1, z1 = (int(word) // 16 for word in words[2:6])
+            chunks = set(product(range(x0, x1 + 1), range(z0, z1 + 1)))
+            if len(chunks) > 256:
+                return (
+                    "Too many chunks in the specified area "
+                    f"(maximum 256, specified {len(chunks)})"
+                )
+            if words[1] == "add":
+                self.forceloaded |= chunks
+            else:
+                self.forceloaded -= chunks
+            return ""
+
+        self.reads += 1
+        if words[:3] == ["execute", "if", "block"] and len(words) == 7:
+            pos = Vec3(*map(int, words[3:6]))
+            if self.getblock(pos) == Item(words[6]):
+                return "Test passed"
+            return "Test failed"
+        if words[:3] == ["execute", "if", "blocks"] and words[-1] == "all":
+            start, end, dest = (Vec3(*map(int, words[i : i + 3])) for i in (3, 6, 9))
+            source = self._region(start, end)
+            target = self._region(dest, dest + (end - start))
+            if np.array_equal(source, target):
+                return f"Test passed, count: {source.size}"
+            return "Test failed"
+
+        raise ValueError(f"the mock client does not support: {' '.join(words)}")
+
+    def setblock(self, position: Vec3, block: Item, mode: Optional[str] = None):
         """set the block at position in the world"""
+        self.commands += 1
         pos = position + self.offset
-        self.world[pos.x, pos.y, pos.z] = block
+        if mode != "keep" or self.world[pos.x, pos.y, pos.z] == 0:
+            self.world[pos.x, pos.y, pos.z] = self.palette.index(block)
 
     @property
     def loot(self):
@@ -37,7 +99,11 @@ class MockClient:
             def spawn(self, dump):
                 class mine_cls:
                     def mine(self, pos: Vec3):
-                        return str(parent.getblock(pos))
+                        parent.reads += 1
+                        block = parent.getblock(pos)
+                        if block in NO_DROPS:
+                            return "Dropped 0 items from loot table minecraft:empty"
+                        return str(block)
 
                 return mine_cls()
 
@@ -48,21 +114,26 @@ class MockClient:
         start: Vec3,
         end: Vec3,
         block: Item,
-        mode: FillMode = FillMode.KEEP,
-        filter: str = "",
+        mode: Optional[FillMode] = None,
+        filter: Optional[str] = None,
     ):
-        block = Item(block)  # ensure enum
-        if block == Item.AIR:
-            return
+        self.commands += 1
+        index = self.palette.index(block)
         start += self.offset
-        end += self.offset + 1
+        end += self.offset
         lower = Vec3(min(start.x, end.x), min(start.y, end.y), min(start.z, end.z))
         upper = Vec3(max(start.x, end.x), max(start.y, end.y), max(start.z, end.z))
-        self.world[
-            floor(lower.x) : floor(upper.x),
-            floor(lower.y) : floor(upper.y),
-            floor(lower.z) : floor(upper.z),
-        ] = block
+        region = self.world[
+            floor(lower.x) : floor(upper.x) + 1,
+            floor(lower.y) : floor(upper.y) + 1,
+            floor(lower.z) : floor(upper.z) + 1,
+        ]
+        if mode == FillMode.KEEP:
+            region[region == 0] = index
+        elif mode == FillMode.REPLACE and filter is not None:
+            region[region == self.palette.index(filter)] = index
+        else:
+            region[...] = index
 
     ###########################################################################
     # the following are additional functions for use in tests #################
@@ -71,11 +142,16 @@ class MockClient:
     def getblock(self, pos: Vec3) -> Item:
         """return the block at position in the world"""
         pos += self.offset
-        return self.world[int(pos.x), int(pos.y), int(pos.z)]
+        return self.palette[self.world[int(pos.x), int(pos.y), int(pos.z)]]
+
+    def _region(self, start: Vec3, end: Vec3) -> np.ndarray:
+        """the cells of the world from start to end inclusive"""
+        lower, upper = start + self.offset, end + self.offset + 1
+        return self.world[lower.x : upper.x, lower.y : upper.y, lower.z : upper.z]
 
     def compare(self, position: Vec3, cube: Items):
         """verify that the contents of the world at pos matches cube"""
-        ncube = np.array(cube, dtype=Item)
+        ncube = self.palette.encode(cube)
         pos = position + self.offset
         upper = pos + Vec3(*(ncube.shape))
         world_slice = self.world[pos.x : upper.x, pos.y : upper.y, pos.z : upper.z]
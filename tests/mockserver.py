@@ -0,0 +1,86 @@
+"""
+A mock RCON server for testing functions that talk to the minecraft server
+over a real connection. Fill and setblock commands are applied to the world
+of a MockClient, anything else is answered with an error.
+"""
+import socket
+import threading
+from typing import List
+
+from mcipc.rcon.enumerations import FillMode
+from rcon.source.proto import Packet, Type
+
+from mcwb import Vec3
+from tests.mockclient import MockClient
+
+UNKNOWN = "Unknown or incomplete command, see below for error<--[HERE]"
+
+
+class MockServer:
+    def __init__(self, client: MockClient, passwd: str = "passwd"):
+        """listen on a free localhost port and serve the world of client"""
+        self.client = client
+        self.passwd = passwd
+        self.commands: List[str] = []  # the commands received in order of arrival
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self.host, self.port = self._server.getsockname()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def close(self):
+        self._server.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        with conn, conn.makefile("rb") as reader:
+            while True:
+                try:
+                    request = Packet.read(reader)
+                except Exception:
+                    return
+                if request.type == Type.SERVERDATA_AUTH:
+                    ok = request.payload.decode() == self.passwd
+                    reply = Packet(request.id if ok else -1, Type(2), b"")
+                else:
+                    with self._lock:
+                        text = self.execute(request.payload.decode())
+                    reply = Packet(request.id, Type(0), text.encode())
+                conn.sendall(bytes(reply))
+
+    def execute(self, command: str) -> str:
+        """apply a command to the world and return the reply text"""
+        self.commands.append(command)
+        words = command.split()
+        args = [int(float(word)) for word in words if _is_number(word)]
+
+        if words[0] == "setblock":
+            self.client.setblock(Vec3(*args[:3]), words[4])
+            return "Changed the block"
+        if words[0] == "fill":
+            mode = FillMode(words[8]) if len(words) > 8 else None
+            filter = words[9] if len(words) > 9 else None
+            self.client.fill(Vec3(*args[:3]), Vec3(*args[3:6]), words[7], mode, filter)
+            return "Successfully filled blocks"
+        if words[:2] == ["loot", "spawn"]:
+            return str(self.client.getblock(Vec3(*args[3:6])))
+        if words[0] == "execute":
+            return self.client.run(command)
+
+        return UNKNOWN
+
+
+def _is_number(word: str) -> bool:
+    try:
+        float(word)
+    except ValueError:
+        return False
+    return True
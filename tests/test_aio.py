@@ -0,0 +1,119 @@
+"""Tests for mcwb.aio unit."""
+
+import asyncio
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+from mcipc.rcon.exceptions import UnknownCommand
+
+from mcwb import Anchor3, Direction, Planes3d, Vec3, Volume, aio
+from mcwb.itemlists import load_items
+from tests.mockclient import MockClient
+from tests.mockserver import MockServer
+
+cubes_dir = Path(__file__).parent / "cubes"
+
+
+class TestAsync(TestCase):
+    """Tests the asynchronous building API against a mock server"""
+
+    def setUp(self):
+        self.world = MockClient(size=40)
+        self.server = MockServer(self.world)
+
+    def tearDown(self):
+        self.server.close()
+
+    def run_with_client(self, coroutine, concurrency=8):
+        async def main():
+            client = aio.AsyncClient(
+                self.server.host, self.server.port, "passwd", concurrency=concurrency
+            )
+            async with client:
+                return await coroutine(client)
+
+        return asyncio.run(main())
+
+    def test_polygon_and_grab(self):
+        async def build(client):
+            await aio.polygon(
+                client,
+                center=Vec3(0, 0, 0),
+                height=2,
+                diameter=5,
+                item=Item.BLUE_CONCRETE,
+                direction=Direction.UP,
+            )
+            size = Vec3(5, 5, 5)
+            vol = Volume.from_anchor(Vec3(0, 0, 0), size, Anchor3.BOTTOM_CENTER)
+            return await aio.grab(client, vol)
+
+        cuboid = self.run_with_client(build)
+
+        expected = load_items(cubes_dir / "poly.cube")
+        self.assertTrue(self.world.compare(Vec3(-2, 0, -2), expected))
+        self.assertEqual(cuboid, expected)
+
+    def test_dropped_connection(self):
+        async def drop(client):
+            client._writer.transport.abort()
+            await asyncio.sleep(0.1)  # let the receiver see the connection close
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(client.run("list"), timeout=5)
+
+        self.run_with_client(drop)
+
+    def test_failed_command(self):
+        async def build(client):
+            commands = (
+                client.run("nonsense" if x == -17 else f"setblock {x} 0 0 stone")
+                for x in range(-20, 20)
+            )
+            with self.assertRaises(UnknownCommand):
+                await aio._run_all(client, commands)
+            sent = len(self.server.commands)
+            await asyncio.sleep(0.1)
+            return sent
+
+        sent = self.run_with_client(build, concurrency=4)
+
+        # the commands in flight were cancelled and no more were sent
+        self.assertLess(sent, 20)
+        self.assertEqual(len(self.server.commands), sent)
+        self.assertEqual(self.world.getblock(Vec3(15, 0, 0)), Item.AIR)
+
+    def test_concurrent_builds(self):
+        volumes = [
+            Volume.from_corners(Vec3(x, 0, 0), Vec3(x + 2, 3, 3))
+            for x in range(-15, 15, 5)
+        ]
+
+        async def build(client):
+            await asyncio.gather(*(aio.fill(client, v, Item.STONE) for v in volumes))
+            await asyncio.gather(
+                *(aio.walls(client, v, Item.RED_CONCRETE, top=False) for v in volumes)
+            )
+
+        self.run_with_client(build, concurrency=3)
+
+        for vol in volumes:
+            self.assertEqual(self.world.getblock(vol.start), Item.RED_CONCRETE)
+            self.assertEqual(self.world.getblock(vol.start + Vec3(1, 2, 1)), Item.STONE)
+
+    def test_blocks(self):
+        cube = load_items(cubes_dir / "RGB.cube")
+
+        async def build(client):
+            blocks = aio.AsyncBlocks(client, Vec3(0, 0, 0), cube)
+            await blocks.render()
+            await blocks.move(Vec3(1, 2, 3))
+            await blocks.rotate(Planes3d.XY)
+            await blocks.rotate(Planes3d.XY, steps=3)
+            return blocks
+
+        self.run_with_client(build)
+
+        self.assertTrue(self.world.compare(Vec3(1, 2, 3), cube))
+        self.assertEqual(np.count_nonzero(self.world.world), 26)
@@ -0,0 +1,189 @@
+"""Tests for mcwb.anvil unit."""
+
+import zlib
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import Blocks, Palette, Vec3, Volume, nbt
+from mcwb.anvil import AnvilWorld
+from mcwb.itemlists import grab
+from tests.mockclient import MockClient
+
+NAMES = ["minecraft:air", "minecraft:stone", "minecraft:dirt", "minecraft:gold_block"]
+# unused palette entries that make the states 5 bits wide
+PADDING = [f"minecraft:{color}_wool" for color in ("red", "blue", "lime", "cyan")] * 4
+
+
+def pack(values, bits, spanning):
+    """pack block states into signed longs, the slow and obvious way"""
+    if spanning:
+        stream = sum(int(value) << (i * bits) for i, value in enumerate(values))
+        count = -(-len(values) * bits // 64)
+        longs = [(stream >> (64 * i)) & (2**64 - 1) for i in range(count)]
+    else:
+        per_long = 64 // bits
+        longs = [
+            sum(int(v) << (j * bits) for j, v in enumerate(values[i : i + per_long]))
+            for i in range(0, len(values), per_long)
+        ]
+    return np.array(longs, dtype=np.uint64).view(np.int64)
+
+
+def section(blocks, spanning):
+    """palette and data of a section given a [x, y, z] array of NAMES indices"""
+    names = NAMES + PADDING if spanning else NAMES  # values crossing longs
+    values = blocks.transpose(1, 2, 0).reshape(-1)
+    bits = max(4, (len(names) - 1).bit_length())
+    return [{"Name": name} for name in names], pack(values, bits, spanning)
+
+
+def write_regions(folder, chunks, compression=2):
+    """write region files for chunk NBT keyed by chunk (x, z)"""
+    regions = {}
+    for (x, z), root in chunks.items():
+        regions.setdefault((x // 32, z // 32), {})[x % 32, z % 32] = root
+    for (x, z), region in regions.items():
+        write_region(folder / f"r.{x}.{z}.mca", region, compression)
+
+
+def write_region(path, chunks, compression=2):
+    """
+    write a region file of chunk NBT keyed by (x, z) in the region, with
+    the chunks in .mcc files of their own if compression has flag 128
+    """
+    rx, rz = (int(n) for n in path.name.split(".")[1:3])
+    header = bytearray(8192)
+    body = bytearray()
+    for (x, z), root in chunks.items():
+        data = zlib.compress(nbt.dumps(root, compress=False))
+        if compression & 128:
+            external = path.parent / f"c.{rx * 32 + x}.{rz * 32 + z}.mcc"
+            external.write_bytes(data)
+            data = b""
+        chunk = (len(data) + 1).to_bytes(4, "big") + bytes([compression]) + data
+        chunk += bytes(-len(chunk) % 4096)
+        offset = 2 + len(body) // 4096
+        index = 4 * (x + z * 32)
+        header[index : index + 4] = ((offset << 8) | len(chunk) // 4096).to_bytes(
+            4, "big"
+        )
+        body += chunk
+    path.write_bytes(bytes(header + body))
+
+
+class TestAnvilWorld(TestCase):
+    """Tests reading blocks from region files"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.blocks = {
+            key: rng.integers(0, len(NAMES), (16, 16, 16))
+            for key in [(-1, 0), (0, 0), (0, 1)]
+        }
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        (self.path / "region").mkdir()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def expected(self, vol):
+        """the NAMES indices of vol, chunk sections are at section y 0"""
+        world = np.zeros((48, 16, 32), dtype=int)
+        for (cx, cz), blocks in self.blocks.items():
+            world[(cx + 1) * 16 : (cx + 2) * 16, :, cz * 16 : (cz + 1) * 16] = blocks
+        items = np.array([Item(name) for name in NAMES], dtype=Item)
+        s, e = vol.start + Vec3(16, 0, 0), vol.end + Vec3(17, 1, 1)
+        return items[world[s.x : e.x, s.y : e.y, s.z : e.z]]
+
+    def check(self, chunks):
+        write_regions(self.path / "region", chunks)
+
+        vol = Volume.from_corners(Vec3(-5, 2, 3), Vec3(12, 14, 20))
+        with AnvilWorld(self.path) as world:
+            result = np.array(grab(world, vol))  # type: ignore
+            self.assertTrue(np.array_equal(result, self.expected(vol)))
+            palette = Palette()
+            indices = world.grab_indices(vol, palette)
+            blocks = Blocks(MockClient(), vol.start, indices, palette=palette)
+            self.assertTrue(np.array_equal(blocks.ncube, self.expected(vol)))
+
+            # chunks that were not generated and sections that are missing
+            self.assertEqual(world.get_block(Vec3(100, 0, 100)), Item.AIR)
+            self.assertEqual(world.get_block(Vec3(0, 40, 0)), Item.AIR)
+
+    def test_sections(self):
+        chunks = {}
+        for key, blocks in self.blocks.items():
+            palette, data = section(blocks, spanning=False)
+            states = {"palette": palette, "data": data}
+            chunks[key] = {
+                "DataVersion": nbt.Int(3120),
+                "sections": [
+                    {"Y": nbt.Byte(0), "block_states": states},
+                    {"Y": nbt.Byte(1), "block_states": {"palette": palette[:1]}},
+                ],
+            }
+        self.check(chunks)
+
+    def test_old_level_sections(self):
+        chunks = {}
+        for key, blocks in self.blocks.items():
+            palette, data = section(blocks, spanning=True)
+            chunks[key] = {
+                "DataVersion": nbt.Int(1976),
+                "Level": {
+                    "Sections": [
+                        {"Y": nbt.Byte(0), "Palette": palette, "BlockStates": data}
+                    ]
+                },
+            }
+        self.check(chunks)
+
+    def sections(self):
+        """chunks of 1.18 onward sections"""
+        chunks = {}
+        for key, blocks in self.blocks.items():
+            palette, data = section(blocks, spanning=False)
+            states = {"palette": palette, "data": data}
+            chunks[key] = {
+                "DataVersion": nbt.Int(3120),
+                "sections": [{"Y": nbt.Byte(0), "block_states": states}],
+            }
+        return chunks
+
+    def test_external_chunks(self):
+        write_regions(self.path / "region", self.sections(), compression=128 | 2)
+        vol = Volume.from_corners(Vec3(-5, 2, 3), Vec3(12, 14, 20))
+        with AnvilWorld(self.path) as world:
+            result = np.array(grab(world, vol))  # type: ignore
+        self.assertTrue(np.array_equal(result, self.expected(vol)))
+
+    def test_lz4(self):
+        write_regions(self.path / "region", self.sections(), compression=4)
+        with AnvilWorld(self.path) as world:
+            with self.assertRaisesRegex(ValueError, "LZ4"):
+                world.get_block(Vec3(0, 0, 0))
+
+    def test_unknown_block(self):
+        chunks = self.sections()
+        chunks[0, 0]["sections"][0]["block_states"]["palette"][3] = {
+            "Name": "mymod:shiny_block"
+        }
+        write_regions(self.path / "region", chunks)
+        vol = Volume.from_corners(Vec3(0, 0, 0), Vec3(15, 15, 15))
+        with AnvilWorld(self.path) as world:
+            with self.assertRaisesRegex(ValueError, "mymod:shiny_block.*chunk 0, 0"):
+                world.grab_indices(vol, Palette())
+
+        with AnvilWorld(self.path, unknown=Item.BEDROCK) as world:
+            palette = Palette()
+            indices = world.grab_indices(vol, palette)
+            self.assertEqual(world.unknown_names, {"mymod:shiny_block"})
+        expected = self.expected(vol)
+        expected[expected == Item.GOLD_BLOCK] = Item.BEDROCK
+        self.assertTrue(np.array_equal(palette.decode(indices), expected))
@@ -0,0 +1,69 @@
+"""Tests for the chunked archive format."""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.archive import Archive, load_archive, save_archive
+from mcwb.palette import Palette
+from mcwb.types import Vec3
+from mcwb.volume import Volume
+
+
+class TestArchive(TestCase):
+    """Tests saving and partially reading archives"""
+
+    def setUp(self):
+        # mostly air above stone, with ore in one corner
+        self.palette = Palette([Item.STONE, Item.IRON_ORE])
+        self.cube = np.zeros((40, 36, 20), dtype=np.uint8)
+        self.cube[:, :16] = 1
+        self.cube[2:5, 3:6, 1:4] = 2
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "world.mcwa"
+        save_archive(self.cube, self.palette, self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        palette = Palette([Item.DIRT])
+        loaded = load_archive(self.path, palette)
+        self.assertEqual(loaded.shape, self.cube.shape)
+        self.assertTrue(
+            np.array_equal(palette.decode(loaded), self.palette.decode(self.cube))
+        )
+
+    def test_profile_and_row(self):
+        for indices in (self.cube[:, :, 0], self.cube[:, 0, 0]):
+            save_archive(indices, self.palette, self.path)
+            loaded = load_archive(self.path, self.palette)
+            self.assertTrue(np.array_equal(loaded, indices))
+
+    def test_dedup(self):
+        with Archive(self.path) as archive:
+            # of 3 * 3 * 2 chunks only the ore chunk and one chunk of air or
+            # stone of each shape at the edges are stored
+            self.assertEqual(archive.unique_chunks, 13)
+
+    def test_partial_read(self):
+        vol = Volume.from_corners(Vec3(1, 14, 2), Vec3(17, 17, 5))
+        with Archive(self.path) as archive:
+            part = archive.read(self.palette, vol)
+            # 4 chunks, but the two air chunks are the same
+            self.assertEqual(archive.chunks_read, 3)
+            self.assertTrue(np.array_equal(part, self.cube[vol.slices()]))
+
+            with self.assertRaises(ValueError):
+                archive.read(
+                    self.palette, Volume.from_corners(Vec3(0, 0, 0), Vec3(40, 0, 0))
+                )
+
+    def test_not_archive(self):
+        path = Path(self.tmp.name) / "other.mcwa"
+        path.write_bytes(b"{}")
+        with self.assertRaises(ValueError):
+            Archive(path)
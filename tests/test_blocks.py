@@ -1,17 +1,34 @@
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import cast
 from unittest import TestCase
 
+import numpy as np
 from mcipc.rcon import Client
+from mcipc.rcon.enumerations import Item
 
 from mcwb.blocks import Blocks
+from mcwb.datapack import Recorder
 from mcwb.itemlists import load_items
-from mcwb.types import Planes3d, Vec3
+from mcwb.types import Planes3d, Render, Vec3
+from mcwb.volume import Volume
 from tests.mockclient import MockClient
 
 cubes_dir = Path(__file__).parent / "cubes"
 
 
+def world_items(client):
+    """the blocks of a mock world, independent of the order they were placed"""
+    return client.palette.decode(client.world)
+
+
+def expected_world(position, cube):
+    """return a mock world containing only cube rendered at position"""
+    expected = MockClient()
+    Blocks(cast(Client, expected), position, cube)
+    return world_items(expected)
+
+
 class TestRotation(TestCase):
     """Test the rotate() function."""
 
@@ -45,3 +62,187 @@ class TestRotation(TestCase):
         rotated = load_items(cubes_dir / "RGBrotateYZ1.cube")
 
         self.assertTrue(self.client.compare(self.start, rotated))
+
+    def test_reshaped(self):
+        cube = np.full((4, 1, 2), Item.STONE, dtype=Item)
+        cube[0, 0, 0] = Item.RED_CONCRETE
+        world_cube = Blocks(cast(Client, self.client), self.start, cube)
+        world_cube.rotate(Planes3d.XY)
+
+        rotated = np.rot90(cube, axes=Planes3d.XY.value)
+        expected = expected_world(self.start, rotated)
+        self.assertTrue(np.array_equal(world_items(self.client), expected))
+
+    def test_ncube_read_only(self):
+        world_cube = Blocks(cast(Client, self.client), self.start, self.cube)
+        with self.assertRaises(ValueError):
+            world_cube.ncube[0, 0, 0] = Item.GOLD_BLOCK
+
+        cube = np.array(self.cube, dtype=Item)
+        cube[0, 0, 0] = Item.GOLD_BLOCK
+        world_cube.ncube = cube
+        self.assertEqual(world_cube.ncube[0, 0, 0], Item.GOLD_BLOCK)
+
+    def test_symmetric_is_free(self):
+        cube = np.full((5, 5, 5), Item.STONE, dtype=Item)
+        world_cube = Blocks(cast(Client, self.client), self.start, cube)
+        self.client.commands = 0
+
+        world_cube.rotate(Planes3d.XZ)
+
+        self.assertEqual(self.client.commands, 0)
+
+
+class TestRender(TestCase):
+    """Test the render strategies."""
+
+    def setUp(self):
+        self.client = MockClient()
+        self.cube = load_items(cubes_dir / "RGB.cube")
+        self.start = Vec3(0, 0, 0)
+
+    def test_strategies_match(self):
+        for strategy in Render:
+            client = MockClient()
+            Blocks(cast(Client, client), self.start, self.cube, strategy=strategy)
+
+            self.assertTrue(client.compare(self.start, self.cube))
+
+    def test_fill_saves_commands(self):
+        cube = np.full((20, 20, 20), Item.STONE, dtype=Item)
+        blocks = Blocks(cast(Client, self.client), self.start, cube)
+
+        self.assertTrue(self.client.compare(self.start, cube))
+        self.assertEqual(self.client.commands, 1)
+        self.assertEqual(blocks.saved_commands, cube.size - 1)
+
+    def test_fill_limit(self):
+        cube = np.full((40, 40, 40), Item.STONE, dtype=Item)
+        Blocks(cast(Client, self.client), self.start, cube)
+
+        self.assertTrue(self.client.compare(self.start, cube))
+        self.assertEqual(self.client.commands, 2)
+
+
+class TestMove(TestCase):
+    """Test the move() and move_to() functions."""
+
+    def setUp(self):
+        self.client = MockClient()
+        self.cube = load_items(cubes_dir / "RGB.cube")
+        self.start = Vec3(0, 0, 0)
+
+    def assertOnly(self, position, cube):
+        """verify the world contains cube at position and nothing else"""
+        self.assertTrue(
+            np.array_equal(world_items(self.client), expected_world(position, cube))
+        )
+
+    def test_move(self):
+        world_cube = Blocks(cast(Client, self.client), self.start, self.cube)
+        for vector in [Vec3(1, 0, 0), Vec3(0, -2, 1), Vec3(-1, 1, -3)]:
+            world_cube.move(vector)
+        self.assertOnly(Vec3(0, -1, -2), self.cube)
+
+    def test_move_to(self):
+        world_cube = Blocks(cast(Client, self.client), self.start, self.cube)
+        world_cube.move_to(Vec3(1, 1, 1))
+        self.assertOnly(Vec3(1, 1, 1), self.cube)
+
+        world_cube.move_to(Vec3(-20, 5, 10))
+        self.assertOnly(Vec3(-20, 5, 10), self.cube)
+
+    def test_move_solid_is_cheap(self):
+        cube = np.full((20, 20, 20), Item.STONE, dtype=Item)
+        world_cube = Blocks(cast(Client, self.client), self.start, cube)
+        self.client.commands = 0
+
+        world_cube.move(Vec3(1, 0, 0))
+
+        self.assertEqual(self.client.commands, 2)
+        self.assertOnly(Vec3(1, 0, 0), cube)
+
+
+class TestStructure(TestCase):
+    """Test saving and loading structure files."""
+
+    def setUp(self):
+        self.client = MockClient()
+        self.cube = load_items(cubes_dir / "RGB.cube")
+
+    def test_save_load(self):
+        cube = np.array(self.cube, dtype=Item)
+        cube[0, 0, 0] = Item.AIR  # air is left out of the file
+        world_cube = Blocks(cast(Client, self.client), Vec3(0, 0, 0), cube)
+
+        with TemporaryDirectory() as tmp:
+            world_cube.save_blocks(Path(tmp) / "rgb.nbt")
+            other = MockClient()
+            loaded = Blocks(cast(Client, other), Vec3(0, 0, 0), [[[]]], render=False)
+            loaded.load_blocks(Path(tmp) / "rgb.nbt")
+
+        self.assertTrue(np.array_equal(loaded.ncube, cube))
+        self.assertTrue(np.array_equal(world_items(other), world_items(self.client)))
+
+    def test_binary(self):
+        world_cube = Blocks(cast(Client, self.client), Vec3(0, 0, 0), self.cube)
+
+        with TemporaryDirectory() as tmp:
+            world_cube.save_blocks(Path(tmp) / "rgb.mcwb", compress=True)
+            loaded = Blocks(cast(Client, self.client), Vec3(0, 0, 0), [[[]]], False)
+            loaded.load_blocks(Path(tmp) / "rgb.mcwb")
+
+        self.assertEqual(loaded.to_cuboid(), self.cube)
+
+    def test_from_file(self):
+        cube = np.random.default_rng(3).choice(
+            np.array([Item.AIR, Item.STONE, Item.DIRT], dtype=Item), (30, 20, 10)
+        )
+        floor = Volume.from_corners(Vec3(2, 5, 0), Vec3(29, 5, 9))
+
+        with TemporaryDirectory() as tmp:
+            Blocks(self.client, Vec3(0, 0, 0), cube, render=False).save_blocks(
+                Path(tmp) / "big.mcwb"
+            )
+            world_cube = Blocks.from_file(
+                cast(Client, self.client), Vec3(0, 40, 0), Path(tmp) / "big.mcwb", floor
+            )
+            # a view of the read only memory map, not a copy
+            self.assertFalse(world_cube.indices.flags.writeable)
+            self.assertTrue(self.client.compare(Vec3(0, 40, 0), cube[2:, 5:6]))
+            del world_cube
+
+            with self.assertRaises(ValueError):
+                Blocks.from_file(
+                    cast(Client, self.client),
+                    Vec3(0, 0, 0),
+                    Path(tmp) / "big.mcwb",
+                    Volume.from_corners(Vec3(0, 0, 0), Vec3(30, 0, 0)),
+                )
+
+    def test_archive(self):
+        world_cube = Blocks(cast(Client, self.client), Vec3(0, 0, 0), self.cube)
+
+        with TemporaryDirectory() as tmp:
+            world_cube.save_blocks(Path(tmp) / "rgb.mcwa")
+            loaded = Blocks(cast(Client, self.client), Vec3(0, 0, 0), [[[]]], False)
+            loaded.load_blocks(Path(tmp) / "rgb.mcwa")
+            corner = Blocks.from_file(
+                cast(Client, self.client),
+                Vec3(0, 20, 0),
+                Path(tmp) / "rgb.mcwa",
+                Volume.from_corners(Vec3(0, 0, 0), Vec3(1, 1, 1)),
+            )
+
+        self.assertEqual(loaded.to_cuboid(), self.cube)
+        self.assertTrue(
+            self.client.compare(Vec3(0, 20, 0), np.array(self.cube)[:2, :2, :2])
+        )
+        self.assertEqual(corner.volume.size, Vec3(2, 2, 2))
+
+    def test_place_template(self):
+        recorder = Recorder()
+        world_cube = Blocks(recorder, Vec3(2, 3, 4), self.cube, render=False)
+        world_cube.place_template("mcwb:rgb")
+
+        self.assertEqual(recorder.commands, ["place template mcwb:rgb 2 3 4"])
@@ -0,0 +1,84 @@
+"""Tests for mcwb.cache unit."""
+
+from pathlib import Path
+from unittest import TestCase
+
+from mcipc.rcon.enumerations import FillMode, Item
+
+from mcwb import Blocks, Grab, Vec3, Volume, get_block
+from mcwb.cache import BlockCache
+from mcwb.itemlists import grab, load_items
+from tests.mockclient import MockClient
+
+cubes_dir = Path(__file__).parent / "cubes"
+
+
+class TestBlockCache(TestCase):
+    """Tests caching the blocks written and read by mcwb"""
+
+    def setUp(self):
+        self.client = MockClient()
+        self.cache = BlockCache(self.client)
+
+    def test_read_back_build(self):
+        cube = load_items(cubes_dir / "RGB.cube")
+        vol = Volume.from_corners(Vec3(-20, -2, -20), Vec3(20, 4, 20))
+        vol.fill(self.cache, Item.AIR)  # type: ignore
+        Blocks(self.cache, Vec3(7, 0, 14), cube)  # type: ignore
+
+        blocks = Blocks.from_volume(self.cache, vol)  # type: ignore
+
+        self.assertEqual(self.client.reads, 0)
+        self.assertEqual(self.cache.misses, 0)
+        self.assertEqual(blocks.ncube.tolist(), grab(self.client, vol))  # type: ignore
+
+    def test_partly_known(self):
+        # blocks placed behind the cache's back are read from the server
+        self.client.fill(Vec3(-5, -5, -5), Vec3(5, 0, 5), Item.DIRT)
+        self.cache.fill(Vec3(-3, -3, -3), Vec3(3, 3, 3), Item.STONE, FillMode.KEEP)
+        self.cache.fill(
+            Vec3(-1, -1, -1), Vec3(1, 1, 1), Item.GOLD_BLOCK, FillMode.REPLACE, "stone"
+        )
+        self.cache.setblock(Vec3(0, 0, 0), Item.GLASS)
+
+        vol = Volume.from_corners(Vec3(-6, -6, -6), Vec3(6, 6, 6))
+        expected = grab(self.client, vol)  # type: ignore
+        self.client.reads = 0
+
+        for strategy in Grab:
+            self.assertEqual(grab(self.cache, vol, strategy), expected)  # type: ignore
+
+        # the second grab was entirely from the cache
+        self.assertEqual(self.cache.misses, self.client.reads)
+        block = get_block(self.cache, Vec3(0, 0, 0))  # type: ignore
+        self.assertEqual(block, Item.GLASS)
+
+    def test_hollow(self):
+        self.cache.fill(Vec3(0, 0, 0), Vec3(20, 20, 20), Item.STONE, FillMode.HOLLOW)
+
+        self.assertEqual(self.cache.get_block(Vec3(0, 7, 7)), Item.STONE)
+        self.assertEqual(self.cache.get_block(Vec3(20, 20, 20)), Item.STONE)
+        self.assertEqual(self.cache.get_block(Vec3(18, 17, 19)), Item.AIR)
+        self.assertEqual(self.client.reads, 0)
+
+    def test_eviction(self):
+        cache = BlockCache(self.client, max_sections=2, ttl=60)
+        for x in (0, 16, 32):
+            cache.setblock(Vec3(x, 0, 0), Item.STONE)
+        self.assertEqual(len(cache), 2)
+
+        # the least recently used section was evicted
+        cache.get_block(Vec3(0, 0, 0))
+        self.assertEqual(cache.misses, 1)
+        cache.get_block(Vec3(32, 0, 0))
+        self.assertEqual(cache.misses, 1)
+
+        cache.ttl = 0
+        cache.get_block(Vec3(32, 0, 0))
+        self.assertEqual(cache.misses, 2)
+
+        cache.ttl = None
+        cache.invalidate(Volume.from_corners(Vec3(30, 0, 0), Vec3(40, 0, 0)))
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
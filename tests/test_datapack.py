@@ -0,0 +1,69 @@
+"""Tests for mcwb.datapack unit."""
+
+import zipfile
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from mcipc.rcon.enumerations import Item
+
+from mcwb import Blocks, Vec3, Volume
+from mcwb.datapack import Recorder
+from mcwb.itemlists import load_items
+from tests.mockclient import MockClient
+from tests.mockserver import MockServer
+
+cubes_dir = Path(__file__).parent / "cubes"
+
+
+class TestRecorder(TestCase):
+    """Tests exporting builds as a datapack"""
+
+    def setUp(self):
+        self.cube = load_items(cubes_dir / "RGB.cube")
+        self.recorder = Recorder()
+        vol = Volume.from_corners(Vec3(-9, -9, -9), Vec3(-1, -1, -1))
+        vol.fill(self.recorder, Item.STONE)  # type: ignore
+        Blocks(self.recorder, Vec3(0, 0, 0), self.cube)  # type: ignore
+
+    def replay(self, functions, name="build"):
+        """run the functions on a mock world, following the schedule chain"""
+        world = MockClient()
+        server = MockServer(world)
+        server.close()
+        while name:
+            commands, name = functions[name], None
+            for command in commands:
+                if command.startswith("schedule function"):
+                    name = command.split()[2].split(":")[1]
+                else:
+                    server.execute(command)
+        return world
+
+    def test_split(self):
+        functions = self.recorder.functions("test", max_commands=4)
+
+        self.assertEqual(list(functions)[:2], ["build", "build_1"])
+        self.assertTrue(all(len(part) <= 4 for part in functions.values()))
+        self.assertEqual(functions["build"][-1], "schedule function test:build_1 1t")
+
+        world = self.replay(functions)
+        self.assertTrue(world.compare(Vec3(0, 0, 0), self.cube))
+        self.assertEqual(world.getblock(Vec3(-5, -5, -5)), Item.STONE)
+
+    def test_save(self):
+        with TemporaryDirectory() as tmp:
+            folder = Path(tmp) / "pack"
+            self.recorder.save(folder, "test", max_commands=4)
+            functions = folder / "data" / "test" / "functions"
+
+            self.assertTrue((folder / "pack.mcmeta").exists())
+            self.assertEqual(
+                (functions / "build.mcfunction").read_text().splitlines(),
+                self.recorder.functions("test", max_commands=4)["build"],
+            )
+
+            self.recorder.save(Path(tmp) / "pack.zip", "test")
+            with zipfile.ZipFile(Path(tmp) / "pack.zip") as archive:
+                text = archive.read("data/test/functions/build.mcfunction")
+            self.assertEqual(text.decode().splitlines(), self.recorder.commands)
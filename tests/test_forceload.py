@@ -0,0 +1,103 @@
+"""Tests for the ChunkLoader forceload wrapper."""
+
+from itertools import product
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.blocks import Blocks
+from mcwb.forceload import ChunkLoader
+from mcwb.itemlists import grab
+from mcwb.types import Vec3
+from mcwb.volume import Volume
+from tests.mockclient import MockClient
+
+
+class LoadedOnlyClient(MockClient):
+    """a MockClient that fails writes and reads outside forceloaded chunks"""
+
+    def __init__(self):
+        super().__init__()
+        self.most_loaded = 0
+
+    def check(self, start, end):
+        chunks = set(
+            product(
+                range(min(start.x, end.x) // 16, max(start.x, end.x) // 16 + 1),
+                range(min(start.z, end.z) // 16, max(start.z, end.z) // 16 + 1),
+            )
+        )
+        assert chunks <= self.forceloaded, "command sent to an unloaded chunk"
+        self.most_loaded = max(self.most_loaded, len(self.forceloaded))
+
+    def fill(self, start, end, block, mode=None, filter=None):
+        self.check(start, end)
+        return super().fill(start, end, block, mode, filter)
+
+    def setblock(self, position, block, mode=None):
+        self.check(position, position)
+        return super().setblock(position, block, mode)
+
+    def getblock(self, position):
+        self.check(position, position)
+        return super().getblock(position)
+
+
+class TestChunkLoader(TestCase):
+    """Tests that commands only go to loaded chunks"""
+
+    def setUp(self):
+        self.client = LoadedOnlyClient()
+        self.loader = ChunkLoader(self.client, max_chunks=4)
+        self.vol = Volume.from_corners(Vec3(-40, -10, -40), Vec3(40, 10, 40))
+
+    def test_fill(self):
+        with self.loader:
+            self.vol.fill(self.loader, Item.STONE)
+            # each fill spans several chunks, but each chunk is loaded once
+            self.assertEqual(self.loader.loads, 36)
+        self.assertEqual(self.client.forceloaded, set())
+        corner = MockClient.getblock(self.client, Vec3(40, 10, -40))
+        self.assertEqual(corner, Item.STONE)
+
+    def test_blocks(self):
+        cube = np.full((50, 3, 50), Item.AIR, dtype=Item)
+        cube[::7, :, ::5] = Item.GOLD_BLOCK
+        with self.loader:
+            Blocks(self.loader, Vec3(-25, 0, -25), cube)
+            self.assertLessEqual(self.client.most_loaded, 4)
+            self.assertEqual(self.loader.loads, 16)
+        self.assertEqual(self.client.forceloaded, set())
+
+    def test_grab(self):
+        MockClient.fill(self.client, Vec3(-3, 0, -3), Vec3(20, 2, 3), Item.DIRT)
+        small = Volume.from_corners(Vec3(-5, 0, -5), Vec3(21, 1, 5))
+        with self.loader:
+            found = grab(self.loader, small)
+        self.assertEqual(found[2][0][2], Item.DIRT)
+        self.assertEqual(found[0][0][0], Item.AIR)
+        self.assertLessEqual(self.client.most_loaded, 4)
+
+    def test_large_command(self):
+        # a single command may need more than max_chunks
+        with self.loader:
+            self.loader.fill(Vec3(-40, 0, -40), Vec3(40, 0, 40), Item.STONE)
+            self.assertEqual(len(self.loader.loaded), 36)
+            self.loader.setblock(Vec3(0, 1, 0), Item.DIRT)
+            self.assertEqual(len(self.loader.loaded), 36)
+
+    def test_already_forced(self):
+        # chunks forceloaded before the loader started are never released
+        self.client.forceloaded = {(0, 0), (-1, 2)}
+        with self.loader:
+            self.loader.fill(Vec3(-20, 0, 0), Vec3(20, 0, 40), Item.STONE)
+            self.assertNotIn((0, 0), self.loader.loaded)
+        self.assertEqual(self.client.forceloaded, {(0, 0), (-1, 2)})
+
+    def test_long_line(self):
+        # forceload accepts at most 256 chunks per command
+        with self.loader:
+            self.loader.fill(Vec3(0, 0, 0), Vec3(0, 0, 32767), Item.STONE)
+            self.assertEqual(len(self.client.forceloaded), 2048)
+        self.assertEqual(self.client.forceloaded, set())
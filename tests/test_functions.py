@@ -2,11 +2,23 @@
 
 from functools import partial
 from itertools import product
+from time import perf_counter
 from unittest import TestCase
 
-from mcipc.rcon.enumerations import Item
-
-from mcwb.functions import get_direction, normalize, offsets, validate, y_rotate
+import numpy as np
+from mcipc.rcon.enumerations import FillMode, Item
+
+from mcwb.api import tunnel_arrays
+from mcwb.functions import (
+    boxes,
+    get_direction,
+    normalize,
+    offset_array,
+    offsets,
+    rectangles,
+    validate,
+    y_rotate,
+)
 from mcwb.types import Anchor, Direction, Vec3
 
 
@@ -441,6 +453,71 @@ class TestOffsets(TestCase):
                 list(offsets(self.valid_profile, direction, anchor)),
                 self.results[index])
 
+    def test_offset_array(self):
+        """Tests the offsets of a whole profile at once."""
+        for index, (direction, anchor) in enumerate(product(
+                self.directions, self.anchors)):
+            found = offset_array((3, 3), direction, anchor).reshape(-1, 3)
+            expected = [offset for _, offset in self.results[index]]
+            self.assertEqual([Vec3(*cell) for cell in found.tolist()], expected)
+
+    def test_tunnel_arrays(self):
+        """Tests the fills of a tunnel as arrays."""
+        blocks, starts, ends = tunnel_arrays(
+            self.valid_profile, Vec3(10, 0, 0), direction=Direction.EAST, length=5
+        )
+        # four corners and the air between them in at most 3 rectangles
+        self.assertLessEqual(len(blocks), 7)
+
+        world = {}
+        for block, start, end in zip(blocks, starts, ends):
+            self.assertEqual(end[0] - start[0], 4)  # along the tunnel
+            ranges = (range(min(a, b), max(a, b) + 1) for a, b in zip(start, end))
+            for cell in product(*ranges):
+                self.assertNotIn(cell, world)
+                world[cell] = block
+
+        # east facing profiles run north to south (z) and top to bottom (y)
+        self.assertEqual(len(world), 45)
+        for row, items in enumerate(self.valid_profile):
+            for column, block in enumerate(items):
+                for x in range(10, 15):
+                    self.assertEqual(world[x, 1 - row, column - 1], block)
+
+    def test_tunnel_arrays_merge(self):
+        """Tests a solid profile is one fill, within the fill limit."""
+        solid = [[Item.STONE] * 15] * 15
+        blocks, _, _ = tunnel_arrays(solid, Vec3(0, 0, 0), length=100)
+        self.assertEqual(len(blocks), 1)
+
+        blocks, starts, ends = tunnel_arrays(solid, Vec3(0, 0, 0), length=1000)
+        self.assertEqual(len(blocks), 8)
+        for start, end in zip(starts, ends):
+            self.assertLessEqual(np.prod(abs(end - start) + 1), 32768)
+
+    def test_tunnel_arrays_large(self):
+        """Tests planning a large profile takes milliseconds."""
+        rng = np.random.default_rng(5)
+        items = np.array([Item.STONE, Item.DIRT, Item.AIR, Item.GLASS], dtype=Item)
+        blocky = items[(np.indices((100, 100)) // [[[10]], [[7]]]).sum(axis=0) % 4]
+        mixed = items[rng.integers(0, 4, (100, 100))]
+        # typically about 8 and 30 ms, the bounds allow for slow machines
+        for profile, limit in ((blocky, 0.1), (mixed, 0.5)):
+            started = perf_counter()
+            tunnel_arrays(profile, Vec3(0, 0, 0), length=100)
+            self.assertLess(perf_counter() - started, limit)
+
+    def test_tunnel_arrays_hollow(self):
+        """Tests hollow and outline tunnels fill each cell on its own."""
+        solid = [[Item.STONE] * 15] * 15
+        for mode in (FillMode.HOLLOW, FillMode.OUTLINE):
+            blocks, starts, ends = tunnel_arrays(
+                solid, Vec3(0, 0, 0), length=10, mode=mode
+            )
+            self.assertEqual(len(blocks), 225)
+            for start, end in zip(starts, ends):
+                self.assertEqual(np.count_nonzero(end - start), 1)
+
 
 class TestValidate(TestCase):
     """Test the validate() function."""
@@ -487,6 +564,68 @@ class TestValidate(TestCase):
         self.assertEqual(validate(self.invalid_row1), 0)
 
 
+class TestBoxes(TestCase):
+    """Test the boxes() function."""
+
+    def setUp(self):
+        self.cube = np.full((4, 5, 6), Item.STONE, dtype=Item)
+        self.cube[1:3, 1:4, 2:5] = Item.AIR
+        self.cube[3, :, :] = Item.RED_CONCRETE
+
+    def rebuild(self, found, shape):
+        result = np.full(shape, None, dtype=Item)
+        for value, start, end in found:
+            region = result[
+                start.x : end.x + 1, start.y : end.y + 1, start.z : end.z + 1
+            ]
+            self.assertTrue((region == None).all())  # noqa: E711 boxes are disjoint
+            region[...] = value
+        return result
+
+    def test_boxes_cover(self):
+        found = list(boxes(self.cube))
+
+        self.assertTrue(np.array_equal(self.rebuild(found, self.cube.shape), self.cube))
+        self.assertLess(len(found), 10)
+
+    def test_boxes_mask(self):
+        mask = self.cube != Item.AIR
+        found = list(boxes(self.cube, mask))
+        result = self.rebuild(found, self.cube.shape)
+
+        self.assertTrue(np.array_equal(result[mask], self.cube[mask]))
+        self.assertTrue((result[~mask] == None).all())  # noqa: E711
+
+    def test_boxes_max_volume(self):
+        for _, start, end in boxes(self.cube, max_volume=7):
+            self.assertLessEqual((end - start + 1).volume, 7)
+
+    def test_boxes_large(self):
+        # a uniform region is split into close to the fewest legal fills
+        found = list(boxes(np.zeros((200, 100, 200), dtype=np.uint8)))
+        self.assertLess(len(found), 130)
+
+
+class TestRectangles(TestCase):
+    """Test the rectangles() function."""
+
+    def test_rectangles_cover(self):
+        rng = np.random.default_rng(3)
+        profile = rng.integers(0, 3, (30, 40)) // 2  # runs of zeros and ones
+        profile[5:20, 10:35] = 2
+        for max_area in (1, 12, 100, 32768):
+            result = np.full(profile.shape, -1)
+            for value, (top, left), (bottom, right) in rectangles(profile, max_area):
+                region = result[top : bottom + 1, left : right + 1]
+                self.assertTrue((region == -1).all())  # rectangles are disjoint
+                self.assertLessEqual(region.size, max_area)
+                region[...] = value
+            self.assertTrue(np.array_equal(result, profile))
+
+        found = list(rectangles(profile))
+        self.assertIn((2, (5, 10), (19, 34)), found)
+
+
 class TestDirection(TestCase):
     """Test Cardinal Direction Functions"""
 
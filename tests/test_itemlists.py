@@ -5,9 +5,18 @@ import tempfile
 from pathlib import Path
 from unittest import TestCase
 
+import numpy as np
 from mcipc.rcon.item import Item
 
-from mcwb.itemlists import load_items, save_items
+from mcwb import Grab, Vec3, Volume
+from mcwb.itemlists import (
+    grab,
+    grab_slices,
+    load_items,
+    save_items,
+    save_slices,
+)
+from tests.mockclient import MockClient
 
 
 class TestItemLists(TestCase):  # pylint: disable=R0902
@@ -88,3 +97,75 @@ class TestItemLists(TestCase):  # pylint: disable=R0902
         # validate the 'any dimensions' call to load_items
         items = load_items(path)
         self.assertEqual(items, self.cube)
+
+    def test_binary(self):
+        """Tests the saving of cuboids in the binary format."""
+        cuboid = np.array(self.cube, dtype=Item)
+        for name, binary, compress in [
+            ("cuboid.mcwb", None, False),
+            ("cuboid.mcwb", None, True),
+            ("cuboid.dat", True, True),
+        ]:
+            save_items(cuboid, self.test_dir / name, binary, compress)
+            loaded = load_items(self.test_dir / name, dimensions=3)
+            self.assertTrue(np.array_equal(loaded, cuboid))
+
+        save_items(cuboid, self.test_dir / "cuboid.mcwa")
+        loaded = load_items(self.test_dir / "cuboid.mcwa", dimensions=3)
+        self.assertTrue(np.array_equal(loaded, cuboid))
+
+        save_items(self.cube, self.test_dir / "cuboid.json", binary=False)
+        with open(self.test_dir / "cuboid.json") as file:
+            self.assertEqual(file.read(1), "[")
+
+
+class TestGrab(TestCase):
+    """Tests reading blocks from the world"""
+
+    def setUp(self):
+        # terrain: stone below y=0 with an ore vein and a tree trunk
+        self.client = MockClient()
+        Volume.from_corners(Vec3(-16, -10, -16), Vec3(15, -1, 15)).fill(
+            self.client, Item.STONE  # type: ignore
+        )
+        self.client.fill(Vec3(3, -5, 3), Vec3(4, -4, 6), Item.IRON_ORE)
+        self.client.fill(Vec3(-7, 0, 2), Vec3(-7, 4, 2), Item.OAK_LOG)
+        self.vol = Volume.from_corners(Vec3(-16, -8, -16), Vec3(15, 7, 15))
+
+    def test_octree_matches_cells(self):
+        cells = grab(self.client, self.vol)  # type: ignore
+        cell_reads, self.client.reads = self.client.reads, 0
+        octree = grab(self.client, self.vol, Grab.OCTREE)  # type: ignore
+
+        self.assertEqual(cell_reads, self.vol.size.volume)
+        self.assertTrue(np.array_equal(np.array(octree), np.array(cells)))
+        self.assertLess(self.client.reads * 20, cell_reads)
+        self.assertEqual(octree[19][3][19], Item.IRON_ORE)
+        self.assertEqual(octree[9][12][18], Item.OAK_LOG)
+
+    def test_slices(self):
+        expected = np.array(grab(self.client, self.vol))  # type: ignore
+        calls = []
+
+        def progress(done, total):
+            calls.append((done, total))
+
+        layers = grab_slices(self.client, self.vol, progress=progress)  # type: ignore
+        first = next(layers)
+        self.assertEqual(calls, [(1, 16)])
+        self.assertEqual(first.shape, (32, 32))
+
+        result = np.stack([first, *layers], axis=1)
+        self.assertTrue(np.array_equal(result, expected))
+        self.assertEqual(calls[-1], (16, 16))
+
+    def test_save_slices(self):
+        test_dir = Path(tempfile.mkdtemp())
+        vol = Volume.from_corners(Vec3(0, -3, 0), Vec3(3, -2, 2))
+        save_items(grab(self.client, vol), test_dir / "items.json")  # type: ignore
+        slices = grab_slices(self.client, vol, axis=0)  # type: ignore
+        save_slices(slices, test_dir / "slices.json")
+
+        text = (test_dir / "items.json").read_text()
+        self.assertEqual((test_dir / "slices.json").read_text(), text)
+        shutil.rmtree(test_dir)
@@ -0,0 +1,56 @@
+"""Tests for mcwb.nbt unit."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from mcwb import nbt
+
+
+class TestNbt(TestCase):
+    """Tests reading and writing NBT documents"""
+
+    def test_round_trip(self):
+        root = {
+            "byte": nbt.Byte(-3),
+            "short": nbt.Short(1000),
+            "int": 70000,
+            "long": nbt.Long(2**40),
+            "float": nbt.Float(0.5),
+            "double": 0.25,
+            "name": "minecraft:stone",
+            "list": [[nbt.Int(1), nbt.Int(2)], []],
+            "compound": {"nested": {"empty": {}}},
+            "bytes": np.arange(-3, 3, dtype=np.int8),
+            "ints": np.arange(5, dtype=np.int32),
+            "longs": np.array([-1, 2**62], dtype=np.int64),
+        }
+
+        for compress in (True, False):
+            result = nbt.loads(nbt.dumps(root, compress))
+            self.assertEqual(list(result), list(root))
+            for key, value in root.items():
+                if isinstance(value, np.ndarray):
+                    self.assertEqual(result[key].dtype, value.dtype)
+                    self.assertTrue(np.array_equal(result[key], value))
+                else:
+                    self.assertEqual(result[key], value)
+
+        result = nbt.loads(nbt.dumps(root))
+        self.assertIsInstance(result["short"], nbt.Short)
+        self.assertIsInstance(result["int"], nbt.Int)
+        self.assertIsInstance(result["float"], nbt.Float)
+
+    def test_known_bytes(self):
+        # the "hello world" example from the NBT specification
+        data = bytes.fromhex("0a000b68656c6c6f20776f726c640800046e616d65") + (
+            b"\x00\x09Bananrama\x00"
+        )
+        self.assertEqual(nbt.loads(data), {"name": "Bananrama"})
+        # the root name is not kept, so compare the payload
+        self.assertEqual(nbt.dumps({"name": "Bananrama"}, False)[3:], data[14:])
+
+    def test_truncated(self):
+        data = nbt.dumps({"name": "stone"}, False)
+        with self.assertRaises(ValueError):
+            nbt.loads(data[:-3])
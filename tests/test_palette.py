@@ -0,0 +1,63 @@
+"""Tests for mcwb.palette unit."""
+
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb.functions import shift
+from mcwb.palette import Palette
+from mcwb.polygon import poly_profile
+from mcwb.types import Vec3
+
+
+class TestPalette(TestCase):
+    """Tests encoding and decoding Items with a Palette"""
+
+    def setUp(self):
+        self.cube = np.full((3, 4, 5), Item.STONE, dtype=Item)
+        self.cube[0, :, :] = Item.AIR
+        self.cube[1, 1, 1] = Item.RED_CONCRETE
+
+    def test_round_trip(self):
+        palette = Palette()
+        indices = palette.encode(self.cube)
+
+        self.assertEqual(indices.dtype, np.uint8)
+        self.assertEqual(palette[0], Item.AIR)
+        self.assertTrue(np.array_equal(palette.decode(indices), self.cube))
+        self.assertTrue(np.array_equal(indices != 0, self.cube != Item.AIR))
+
+        # lists of Items encode the same as arrays
+        self.assertTrue(np.array_equal(palette.encode(self.cube.tolist()), indices))
+
+    def test_index(self):
+        palette = Palette([Item.STONE])
+
+        self.assertEqual(palette.index(Item.STONE), 1)
+        self.assertEqual(palette.index("red_concrete"), 2)
+        self.assertEqual(len(palette), 3)
+
+    def test_large_palette(self):
+        items = list(Item)[:300]
+        palette = Palette(items)
+
+        self.assertEqual(palette.dtype, np.uint16)
+        self.assertEqual(palette.encode(items)[299], palette.index(items[299]))
+
+    def test_shift(self):
+        palette = Palette()
+        indices = palette.encode(self.cube)
+        vector = Vec3(1, -1, 2)
+
+        shifted = shift(indices, vector)
+
+        expected = shift(self.cube, vector)
+        self.assertTrue(np.array_equal(palette.decode(shifted), expected))
+
+    def test_poly_profile(self):
+        palette = Palette()
+        profile = poly_profile(fill_item=Item.RED_CONCRETE, palette=palette)
+        expected = poly_profile(fill_item=Item.RED_CONCRETE)
+
+        self.assertTrue(np.array_equal(palette.decode(profile), expected))
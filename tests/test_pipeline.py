@@ -0,0 +1,68 @@
+"""Tests for mcwb.pipeline unit."""
+
+from pathlib import Path
+from unittest import TestCase
+
+from mcipc.rcon.enumerations import Item
+from mcipc.rcon.exceptions import UnknownCommand
+from mcipc.rcon.je import Client
+
+from mcwb import Blocks, Vec3, Volume
+from mcwb.itemlists import load_items
+from mcwb.pipeline import Pipeline
+from tests.mockclient import MockClient
+from tests.mockserver import MockServer
+
+cubes_dir = Path(__file__).parent / "cubes"
+
+
+class TestPipeline(TestCase):
+    """Tests pipelining commands to a server"""
+
+    def setUp(self):
+        self.world = MockClient()
+        self.server = MockServer(self.world)
+        self.client = Client(self.server.host, self.server.port, passwd="passwd")
+        self.client.__enter__()
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def test_build(self):
+        cube = load_items(cubes_dir / "RGB.cube")
+        vol = Volume.from_corners(Vec3(-9, -9, -9), Vec3(-1, -1, -1))
+
+        with Pipeline(self.client, window=4) as pipeline:
+            vol.fill(pipeline, Item.STONE)  # type: ignore
+            Blocks(pipeline, Vec3(0, 0, 0), cube)  # type: ignore
+            self.assertGreater(pipeline.in_flight, 0)
+
+        self.assertEqual(pipeline.in_flight, 0)
+        self.assertEqual(pipeline.sent, len(self.server.commands))
+        self.assertTrue(self.world.compare(Vec3(0, 0, 0), cube))
+        self.assertEqual(self.world.getblock(Vec3(-5, -5, -5)), Item.STONE)
+
+    def test_errors(self):
+        pipeline = Pipeline(self.client)
+        pipeline.run("nonsense")
+        pipeline.setblock(Vec3(1, 1, 1), Item.STONE)
+
+        with self.assertRaises(UnknownCommand):
+            pipeline.flush()
+
+        # the commands after the failure are still delivered
+        self.assertEqual(self.world.getblock(Vec3(1, 1, 1)), Item.STONE)
+
+    def test_exception(self):
+        with self.assertRaises(KeyError):
+            with Pipeline(self.client, window=4) as pipeline:
+                pipeline.run("nonsense")
+                pipeline.setblock(Vec3(2, 2, 2), Item.STONE)
+                raise KeyError("build failed")
+
+        # the replies were read, so the client is in step with the server
+        self.assertEqual(pipeline.in_flight, 0)
+        self.assertEqual(len(pipeline.errors), 1)
+        reply = self.client.run("setblock", "3", "3", "3", "stone")
+        self.assertEqual(reply, "Changed the block")
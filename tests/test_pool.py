@@ -0,0 +1,75 @@
+"""Tests for mcwb.pool unit."""
+
+from pathlib import Path
+from unittest import TestCase
+
+from mcipc.rcon.enumerations import Item
+from mcipc.rcon.je import Client
+
+from mcwb import Blocks, Vec3, Volume
+from mcwb.itemlists import grab, load_items
+from mcwb.pool import ClientPool
+from tests.mockclient import MockClient
+from tests.mockserver import MockServer
+
+cubes_dir = Path(__file__).parent / "cubes"
+
+
+class TestClientPool(TestCase):
+    """Tests rendering over several connections to a server"""
+
+    def setUp(self):
+        self.world = MockClient()
+        self.server = MockServer(self.world)
+        self.clients = []
+        for _ in range(3):
+            client = Client(self.server.host, self.server.port, passwd="passwd")
+            client.__enter__()
+            self.clients.append(client)
+        self.pool = ClientPool(self.clients)
+
+    def tearDown(self):
+        self.pool.close()
+        for client in self.clients:
+            client.close()
+        self.server.close()
+
+    def test_fill_in_order(self):
+        vol = Volume.from_corners(Vec3(-30, 0, -30), Vec3(30, 2, 30))
+        hole = Volume.from_corners(Vec3(-20, 1, -20), Vec3(20, 1, 20))
+
+        with self.pool:
+            vol.fill(self.pool, Item.STONE)  # type: ignore
+            hole.fill(self.pool, Item.AIR)  # type: ignore
+
+        self.assertEqual(self.server.connections, 3)
+        # one command per chunk column for each fill
+        self.assertEqual(sum(self.pool.commands), 16 + 16)
+        self.assertEqual(len(self.server.commands), 16 + 16)
+        self.assertTrue(all(rate > 0 for rate in self.pool.throughput))
+
+        self.assertEqual(self.world.getblock(Vec3(-30, 1, 30)), Item.STONE)
+        self.assertEqual(self.world.getblock(Vec3(-20, 1, 20)), Item.AIR)
+        self.assertEqual(self.world.getblock(Vec3(0, 1, 0)), Item.AIR)
+        self.assertEqual(self.world.getblock(Vec3(0, 2, 0)), Item.STONE)
+
+    def test_completed_forgotten(self):
+        for x in range(-40, 40):
+            self.pool.setblock(Vec3(x, 0, 0), Item.STONE)
+        for worker in self.pool._workers:
+            worker.submit(lambda: None).result()  # run everything queued
+
+        self.assertEqual(len(self.pool._futures), 0)
+        self.pool.wait()
+        self.assertEqual(self.world.getblock(Vec3(39, 0, 0)), Item.STONE)
+
+    def test_blocks_and_grab(self):
+        cube = load_items(cubes_dir / "RGB.cube")
+        position = Vec3(-1, 0, 14)  # straddles four chunk columns
+
+        Blocks(self.pool, position, cube)  # type: ignore
+        self.pool.wait()
+        self.assertTrue(self.world.compare(position, cube))
+
+        vol = Volume.from_corners(position, position + Vec3(2, 2, 2))
+        self.assertEqual(grab(self.pool, vol), cube)  # type: ignore
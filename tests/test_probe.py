@@ -0,0 +1,62 @@
+"""Tests for mcwb.probe unit."""
+
+from unittest import TestCase
+
+from mcipc.rcon.enumerations import Item
+
+from mcwb import Vec3, Volume, get_block
+from mcwb.itemlists import grab
+from mcwb.probe import BlockProbe
+from tests.mockclient import MockClient
+
+
+class TestBlockProbe(TestCase):
+    """Tests looking up blocks without loot spawn"""
+
+    def setUp(self):
+        self.client = MockClient()
+        Volume.from_corners(Vec3(-20, -10, -20), Vec3(19, -1, 19)).fill(
+            self.client, Item.STONE  # type: ignore
+        )
+        self.client.fill(Vec3(3, -5, 3), Vec3(4, -4, 6), Item.IRON_ORE)
+        self.client.fill(Vec3(-20, -1, -20), Vec3(-1, -1, -1), Item.GRASS_BLOCK)
+        self.vol = Volume.from_corners(Vec3(-20, -4, -20), Vec3(19, 3, 19))
+
+    def test_grab(self):
+        expected = grab(self.client, self.vol)  # type: ignore
+        probe = BlockProbe(self.client)
+
+        self.assertEqual(grab(probe, self.vol), expected)  # type: ignore
+        self.assertEqual(probe.lookups, self.vol.size.volume)
+        # loot spawn is only needed for the first sight of the rarer blocks
+        self.assertLessEqual(probe.fallbacks, 2)
+        self.assertLess(probe.commands_per_lookup, 1.1)
+
+    def test_unknown_block(self):
+        self.client.setblock(Vec3(0, 5, 0), Item.GOLD_BLOCK)
+        probe = BlockProbe(self.client, max_probes=2)
+
+        block = get_block(probe, Vec3(0, 5, 0))  # type: ignore
+        self.assertEqual(block, Item.GOLD_BLOCK)
+        # two candidates, then loot spawn and a test to confirm its result
+        self.assertEqual((probe.probes, probe.fallbacks), (3, 1))
+
+        # the probe learns the block for next time
+        self.assertEqual(probe.get_block(Vec3(0, 5, 0)), Item.GOLD_BLOCK)
+        self.assertEqual((probe.probes, probe.fallbacks), (4, 1))
+        self.assertEqual(probe.get_block(Vec3(0, 6, 0)), Item.AIR)
+
+    def test_no_drops(self):
+        self.client.setblock(Vec3(0, 5, 0), Item.BARRIER)
+        probe = BlockProbe(self.client)
+
+        # an empty loot table is not mistaken for air, nor learned
+        with self.assertRaises(ValueError):
+            probe.get_block(Vec3(0, 5, 0))
+        self.assertEqual(probe.get_block(Vec3(0, 6, 0)), Item.AIR)
+        self.assertNotIn(Item.BARRIER, probe._world)
+        self.assertEqual(probe._world[Item.AIR], 1)
+
+        probe = BlockProbe(self.client, candidates=[Item.AIR, Item.BARRIER])
+        self.assertEqual(probe.get_block(Vec3(0, 5, 0)), Item.BARRIER)
+        self.assertEqual(probe.fallbacks, 0)
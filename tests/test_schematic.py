@@ -0,0 +1,107 @@
+"""Tests for mcwb.schematic unit."""
+
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import Blocks, Vec3, nbt
+from mcwb.palette import Palette
+from mcwb.schematic import load_schem
+from tests.mockclient import MockClient
+
+STATES = [
+    "minecraft:air",
+    "minecraft:stone",
+    "minecraft:oak_log[axis=y]",
+    "minecraft:gold_block",
+]
+ITEMS = np.array([Item.AIR, Item.STONE, Item.OAK_LOG, Item.GOLD_BLOCK], dtype=Item)
+
+
+def varints(values):
+    """encode unsigned LEB128 varints"""
+    data = bytearray()
+    for value in values:
+        while value >= 0x80:
+            data.append(value & 0x7F | 0x80)
+            value >>= 7
+        data.append(value)
+    return np.frombuffer(bytes(data), dtype=np.int8)
+
+
+def pack_stream(values, bits):
+    """pack values into a continuous little endian stream of longs"""
+    stream = sum(int(value) << (i * bits) for i, value in enumerate(values))
+    count = -(-len(values) * bits // 64)
+    longs = [(stream >> (64 * i)) & (2**64 - 1) for i in range(count)]
+    return np.array(longs, dtype=np.uint64).view(np.int64)
+
+
+class TestSchematic(TestCase):
+    """Tests importing schematic files"""
+
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name)
+        # an [x, y, z] cube of STATES indices
+        self.blocks = np.random.default_rng(2).integers(0, 4, (5, 3, 7))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_schem(self):
+        # palette indices above 127 take two bytes as varints
+        states = STATES + [f"minecraft:stone[n={n}]" for n in range(200)]
+        blocks = self.blocks.copy()
+        blocks[blocks == 1] = 150
+
+        data = varints(blocks.transpose(1, 2, 0).reshape(-1))
+        palette = {state: nbt.Int(i) for i, state in enumerate(states)}
+        size = {"Width": nbt.Short(5), "Height": nbt.Short(3), "Length": nbt.Short(7)}
+        v2 = dict(size, Version=nbt.Int(2), Palette=palette, BlockData=data)
+        v3 = {
+            "Schematic": dict(
+                size, Version=nbt.Int(3), Blocks={"Palette": palette, "Data": data}
+            )
+        }
+
+        for root in (v2, v3):
+            nbt.save(root, self.path / "build.schem")
+            palette = Palette()
+            result = load_schem(self.path / "build.schem", palette)
+            self.assertTrue(np.array_equal(palette.decode(result), ITEMS[self.blocks]))
+
+    def test_litematic(self):
+        def region(position, size, blocks):
+            return {
+                "Position": {axis: nbt.Int(n) for axis, n in zip("xyz", position)},
+                "Size": {axis: nbt.Int(n) for axis, n in zip("xyz", size)},
+                "BlockStatePalette": [{"Name": state} for state in STATES],
+                "BlockStates": pack_stream(blocks.transpose(1, 2, 0).reshape(-1), 2),
+            }
+
+        # a second region, with a negative size, overlaps the first
+        other = np.full((2, 2, 2), 3)
+        other[0, 0, 0] = 0
+        root = {
+            "Regions": {
+                "main": region((0, 0, 0), (5, 3, 7), self.blocks),
+                "extra": region((5, 1, 1), (-2, -2, -2), other),
+            }
+        }
+        nbt.save(root, self.path / "build.litematic")
+
+        expected = np.zeros((6, 3, 7), dtype=int)
+        expected[:5] = self.blocks
+        target = expected[4:6, 0:2, 0:2]
+        np.copyto(target, other, where=other != 0)
+
+        client = MockClient()
+        blocks = Blocks(client, Vec3(0, 0, 0), [[[]]], render=False)  # type: ignore
+        blocks.load_blocks(self.path / "build.litematic")
+
+        self.assertTrue(np.array_equal(blocks.ncube, ITEMS[expected]))
+        self.assertTrue(client.compare(Vec3(0, 0, 0), ITEMS[expected]))
@@ -0,0 +1,91 @@
+"""Tests for the VolumeIndex spatial index."""
+
+import random
+from unittest import TestCase
+
+from mcwb.spatial import VolumeIndex
+from mcwb.types import Vec3
+from mcwb.volume import Volume
+
+
+def distance(vol, pos):
+    """the distance from pos to the nearest block of vol"""
+    deltas = [max(a - p, 0, p - b) for a, p, b in zip(vol.start, pos, vol.end)]
+    return sum(d * d for d in deltas) ** 0.5
+
+
+class TestVolumeIndex(TestCase):
+    """Tests queries against a brute force search"""
+
+    def setUp(self):
+        rng = random.Random(20)
+        self.index = VolumeIndex()
+        self.volumes = []
+        for _ in range(300):
+            start = Vec3(
+                rng.randrange(-500, 500), rng.randrange(0, 50), rng.randrange(-500, 500)
+            )
+            size = Vec3(rng.randrange(40), rng.randrange(20), rng.randrange(40))
+            vol = Volume.from_corners(start, start + size)
+            self.volumes.append(vol)
+            self.index.add(vol)
+        self.points = [
+            Vec3(
+                rng.randrange(-600, 600),
+                rng.randrange(-10, 70),
+                rng.randrange(-600, 600),
+            )
+            for _ in range(200)
+        ]
+
+    def test_at(self):
+        for pos in self.points + [vol.end for vol in self.volumes]:
+            expected = {vol for vol in self.volumes if vol.inside(pos)}
+            self.assertEqual(set(self.index.at(pos)), expected)
+
+    def test_overlapping(self):
+        for query in self.volumes[:50]:
+            expected = {vol for vol in self.volumes if vol.intersects(query)}
+            self.assertEqual(set(self.index.overlapping(query)), expected)
+
+    def test_nearest(self):
+        for pos in self.points:
+            best = min(distance(vol, pos) for vol in self.volumes)
+            self.assertEqual(distance(self.index.nearest(pos), pos), best)
+
+        self.assertIsNone(VolumeIndex().nearest(Vec3(0, 0, 0)))
+
+    def test_move_remove(self):
+        vol = self.volumes[0]
+        self.index.move_to(vol, Vec3(2000, 10, 2000))
+        self.assertIn(vol, self.index.at(Vec3(2000, 10, 2000)))
+        self.assertIs(self.index.nearest(Vec3(2100, 10, 2100)), vol)
+
+        self.index.move(vol, Vec3(-100, 0, 0))
+        self.assertIn(vol, self.index.at(Vec3(1900, 10, 2000)))
+        self.assertNotIn(vol, self.index.at(Vec3(2000, 10, 2000)))
+
+        self.index.remove(vol)
+        self.assertNotIn(vol, self.index)
+        self.assertEqual(len(self.index), 299)
+        self.assertEqual(self.index.at(Vec3(1900, 10, 2000)), [])
+
+    def test_nearest_far(self):
+        for pos in (Vec3(100000, 0, 100000), Vec3(-100000, 0, 30)):
+            best = min(distance(vol, pos) for vol in self.volumes)
+            self.assertEqual(distance(self.index.nearest(pos), pos), best)
+
+    def test_bounds_shrink(self):
+        index = VolumeIndex()
+        near = Volume.from_corners(Vec3(0, 0, 0), Vec3(3, 3, 3))
+        far = Volume.from_corners(Vec3(5000, 0, 5000), Vec3(5003, 3, 5003))
+        index.add(near)
+        index.add(far)
+        index.remove(far)
+        self.assertIs(index.nearest(Vec3(10, 0, 10)), near)
+        self.assertEqual(index._bounds, ((0, 0), (0, 0)))
+
+        index.add(far)
+        index.move_to(far, Vec3(20, 0, 20))
+        self.assertIs(index.nearest(Vec3(40, 0, 40)), far)
+        self.assertEqual(index._bounds, ((0, 0), (1, 1)))
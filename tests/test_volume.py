@@ -1,7 +1,12 @@
 from itertools import product
 from unittest import TestCase
 
-from mcwb import Anchor3, Vec3, Volume
+import numpy as np
+from mcipc.rcon.enumerations import Item
+
+from mcwb import Anchor3, Vec3, Volume, VolumeArray, VolumeSet
+from mcwb.functions import MAX_MINECRAFT_FILL_COMMAND
+from tests.mockclient import MockClient
 
 
 class TestVolume(TestCase):
@@ -111,3 +116,162 @@ class TestVolume(TestCase):
             print(v.start, v.end, v.position, v.size)
             self.assertTrue(v.position == position)
             self.assertTrue(v.size == size)
+
+
+class TestFillBoxes(TestCase):
+    """Tests splitting Volumes into fill commands."""
+
+    def check(self, vol, found):
+        """found must exactly cover vol with legal fills"""
+        covered = set()
+        for start, end in found:
+            self.assertLessEqual((end - start + 1).volume, MAX_MINECRAFT_FILL_COMMAND)
+            cells = set(
+                product(
+                    range(start.x, end.x + 1),
+                    range(start.y, end.y + 1),
+                    range(start.z, end.z + 1),
+                )
+            )
+            self.assertFalse(cells & covered)
+            covered |= cells
+        self.assertEqual(len(covered), vol.size.volume)
+
+    def test_large(self):
+        vol = Volume.from_corners(Vec3(-5, 0, 3), Vec3(194, 99, 202))
+        found = list(vol.fill_boxes())
+        self.check(vol, found)
+        # the least possible is 123
+        self.assertLess(len(found), 130)
+
+    def test_long_axis(self):
+        vol = Volume.from_corners(Vec3(0, 0, 0), Vec3(40000, 0, 1))
+        found = list(vol.fill_boxes())
+        self.assertEqual(len(found), 3)
+        self.assertEqual(sum((end - start + 1).volume for start, end in found), 80002)
+
+    def test_chunk_aligned(self):
+        # 64 x 64 x 16 could be cut anywhere, cuts on chunk boundaries win
+        vol = Volume.from_corners(Vec3(0, 0, 0), Vec3(63, 15, 63))
+        found = list(vol.fill_boxes())
+        self.check(vol, found)
+        self.assertEqual(len(found), 2)
+        for start, end in found:
+            self.assertEqual(start.x % 16, 0)
+            self.assertEqual(start.z % 16, 0)
+
+    def test_walls(self):
+        vol = Volume.from_corners(Vec3(0, 0, 0), Vec3(299, 9, 299))
+        found = list(vol.wall_boxes(thickness=2, north=False, south=False))
+        # 6000 blocks each for east and west, 180000 for the top and bottom
+        self.assertEqual(len(found), 1 + 1 + 6 + 6)
+
+        # the bottom wall is thickness blocks thick
+        bottom = list(
+            vol.wall_boxes(top=False, north=False, south=False, east=False, west=False)
+        )
+        self.assertEqual(len(bottom), 3)
+        self.assertTrue(all(start.y == end.y == 0 for start, end in bottom))
+
+
+class TestVolumeArray(TestCase):
+    """Tests batched Volume queries against Volume."""
+
+    def setUp(self):
+        rng = np.random.default_rng(21)
+        starts = rng.integers(-50, 50, (40, 3))
+        ends = starts + rng.integers(-10, 10, (40, 3))
+        self.volumes = [
+            Volume.from_corners(Vec3(*start), Vec3(*end))
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+        self.array = VolumeArray(starts, ends)
+        self.points = rng.integers(-60, 60, (300, 3))
+
+    def test_inside(self):
+        found = self.array.inside(self.points)
+        expected = [
+            [vol.inside(Vec3(*point)) for point in self.points.tolist()]
+            for vol in self.volumes
+        ]
+        self.assertTrue(np.array_equal(found, expected))
+
+    def test_overlaps(self):
+        others = VolumeArray.from_volumes(self.volumes[:10])
+        expected = [[a.intersects(b) for b in self.volumes[:10]] for a in self.volumes]
+        self.assertTrue(np.array_equal(self.array.overlaps(others), expected))
+        self.assertTrue(self.array.overlaps().diagonal().all())
+
+    def test_from_anchor(self):
+        positions = [(0, 0, 0), (5, -3, 7)]
+        for anchor, size in product(Anchor3, [(3, 3, 3), (4, 5, 6)]):
+            array = VolumeArray.from_anchor(positions, size, anchor)
+            for position, vol in zip(positions, array):
+                expected = Volume.from_anchor(Vec3(*position), Vec3(*size), anchor)
+                self.assertEqual(vol.start, expected.start)
+                self.assertEqual(vol.end, expected.end)
+
+    def test_move(self):
+        self.array.move((1, 2, 3))
+        self.array.move(np.arange(120).reshape(40, 3))
+        vol = self.volumes[7]
+        vol.move(Vec3(1, 2, 3) + Vec3(21, 22, 23))
+        self.assertEqual(self.array[7].start, vol.start)
+        self.assertEqual(self.array[7].size, vol.size)
+
+
+class TestVolumeSet(TestCase):
+    """Tests set operations on Volumes."""
+
+    def setUp(self):
+        self.room = Volume.from_corners(Vec3(0, 0, 0), Vec3(9, 4, 9))
+        self.table = Volume.from_corners(Vec3(3, 0, 3), Vec3(5, 1, 5))
+        self.shelf = Volume.from_corners(Vec3(8, 0, 0), Vec3(12, 3, 0))
+
+    def blocks(self, volumes):
+        """the set of positions in volumes, checking they are disjoint"""
+        result = set()
+        for vol in volumes:
+            cells = set(
+                product(
+                    range(vol.start.x, vol.end.x + 1),
+                    range(vol.start.y, vol.end.y + 1),
+                    range(vol.start.z, vol.end.z + 1),
+                )
+            )
+            self.assertFalse(cells & result)
+            result |= cells
+        return result
+
+    def test_operations(self):
+        room, table, shelf = (
+            self.blocks([vol]) for vol in (self.room, self.table, self.shelf)
+        )
+
+        self.assertEqual(self.blocks(self.room | self.shelf), room | shelf)
+        self.assertEqual(self.blocks(self.room & self.shelf), room & shelf)
+        self.assertEqual(
+            self.blocks(self.room - self.table - self.shelf), room - table - shelf
+        )
+        self.assertEqual(self.blocks((self.room - self.table) & self.table), set())
+        self.assertFalse((self.room - self.table) & self.table)
+
+    def test_normalized(self):
+        overlapping = VolumeSet([self.room, self.table, self.room])
+        self.assertEqual(len(overlapping), 1)
+        self.assertEqual(overlapping.size, 500)
+
+        # a cut out of the floor needs a few boxes around it
+        interior = self.room - self.table
+        self.assertLessEqual(len(interior), 5)
+        self.assertEqual(interior.size, 500 - 18)
+        self.assertFalse(interior.inside(Vec3(4, 1, 4)))
+
+    def test_fill(self):
+        client = MockClient()
+        self.room.fill(client, Item.STONE)
+        (self.room - self.table).fill(client, Item.AIR)
+
+        self.assertEqual(client.getblock(Vec3(4, 1, 4)), Item.STONE)
+        self.assertEqual(client.getblock(Vec3(4, 2, 4)), Item.AIR)
+        self.assertEqual(client.getblock(Vec3(0, 0, 0)), Item.AIR)